@@ -1,12 +1,16 @@
 from __future__ import annotations
 
+import hashlib
 from abc import ABC, abstractmethod
-from typing import Generic, TypeVar, Sequence
+from collections import OrderedDict
+from typing import Generic, Optional, TypeVar, Sequence
+
+from pydantic import BaseModel
 
 from agentic_changescribe.llm.base import LLMClient
 from agentic_changescribe.core.models import ChatMessage
 
-T = TypeVar("T")
+T = TypeVar("T", bound=BaseModel)
 
 
 class Agent(ABC, Generic[T]):
@@ -16,6 +20,16 @@ class Agent(ABC, Generic[T]):
 
     def __init__(self, llm: LLMClient) -> None:
         self.llm = llm
+        self.last_prompt_chars = 0
+        self.last_completion_chars = 0
+        self.last_cached = False
+        self.memo: Optional["OrderedDict[str, T]"] = None
+        self.memo_size = 32
+
+    def enable_memo(self, size: int = 32) -> None:
+        """Reuse results for byte-identical prompts (used by long-running watch mode)."""
+        self.memo = OrderedDict()
+        self.memo_size = size
 
     @abstractmethod
     def build_messages(self, *args, **kwargs) -> Sequence[ChatMessage]:
@@ -25,7 +39,31 @@ class Agent(ABC, Generic[T]):
     def parse(self, text: str) -> T:
         raise NotImplementedError
 
+    def prompt_chars(self, *args, **kwargs) -> int:
+        """Size of the prompt `run` would send, without calling the LLM."""
+        return sum(len(m.content) for m in self.build_messages(*args, **kwargs))
+
     def run(self, *args, **kwargs) -> T:
         messages = self.build_messages(*args, **kwargs)
+        self.last_prompt_chars = sum(len(m.content) for m in messages)
+        key = None
+        if self.memo is not None:
+            h = hashlib.sha256()
+            for m in messages:
+                h.update(f"{m.role}\0{m.content}\0".encode("utf-8"))
+            key = h.hexdigest()
+            if key in self.memo:
+                self.memo.move_to_end(key)
+                self.last_cached = True
+                self.last_completion_chars = 0
+                # Copies both ways: the pipeline mutates results (evidence, risk floor).
+                return self.memo[key].model_copy(deep=True)
+        self.last_cached = False
         text = self.llm.chat(messages)
-        return self.parse(text)
+        self.last_completion_chars = len(text)
+        out = self.parse(text)
+        if key is not None and self.memo is not None:
+            self.memo[key] = out.model_copy(deep=True)
+            while len(self.memo) > self.memo_size:
+                self.memo.popitem(last=False)
+        return out
@@ -1,20 +1,27 @@
 from __future__ import annotations
 
+import json
 import os
 import pathlib
+from enum import Enum
 from typing import Optional
 
 import typer
+import yaml
 from rich.console import Console
 from rich.panel import Panel
+from rich.table import Table
 
 from agentic_changescribe.core.models import UserContext
 from agentic_changescribe.orchestration.pipeline import ChangePackPipeline
+from agentic_changescribe.orchestration.watch import WatchSession
+from agentic_changescribe.tools.fs_watch import FileWatcher
 from agentic_changescribe.tools.git_tools import GitTools
 from agentic_changescribe.tools.redaction import Redactor
 from agentic_changescribe.config import AppConfig, LLMConfig
 from agentic_changescribe.llm.openai_compat import OpenAICompatClient
 from agentic_changescribe.core.tracing import TraceWriter
+from agentic_changescribe.core.trace_stats import StatsReport, TraceStats
 
 app = typer.Typer(add_completion=False, help="AgenticChangeScribe CLI")
 console = Console()
@@ -31,6 +38,80 @@ def _load_llm_config() -> LLMConfig:
     return LLMConfig(base_url=base_url, api_key=api_key, model=model)
 
 
+def _make_llm(llm_cfg: LLMConfig) -> OpenAICompatClient:
+    return OpenAICompatClient(
+        base_url=llm_cfg.base_url,
+        api_key=llm_cfg.api_key,
+        model=llm_cfg.model,
+        timeout_s=llm_cfg.timeout_s,
+        temperature=llm_cfg.temperature,
+    )
+
+
+# Pipeline options shared by `generate` and `watch`.
+_MINIMIZE_DIFF_OPT = typer.Option(
+    True, help="Collapse generated/vendored/lockfile diffs and trim context before prompting."
+)
+_RUN_TESTS_OPT = typer.Option(
+    False, help="Run the recommended test commands locally (in parallel with the agents) and use results as evidence."
+)
+_CODE_INDEX_OPT = typer.Option(
+    True, help="Use the local symbol/import index to add blast-radius evidence."
+)
+_RELATED_CONTEXT_OPT = typer.Option(
+    True, help="Use the local BM25 index to add unchanged code/config that references identifiers in the diff."
+)
+_HISTORY_OPT = typer.Option(
+    True, help="Use the incremental git-history index to add per-file hotspot evidence."
+)
+_HISTORY_RISK_FLOOR_OPT = typer.Option(
+    False, help="Let history hotspots set a minimum risk level (MEDIUM, or HIGH with a recent revert)."
+)
+_MAX_TOKENS_OPT = typer.Option(
+    None, help="Token budget for the run; Reviewer/revision calls that would exceed it are skipped or downgraded."
+)
+_MAX_SECONDS_OPT = typer.Option(
+    None, help="Wall-clock budget for the run (seconds), enforced like --max-tokens."
+)
+
+
+class Severity(str, Enum):
+    INFO = "INFO"
+    WARN = "WARN"
+    ERROR = "ERROR"
+
+
+_REVISE_MIN_SEVERITY_OPT = typer.Option(
+    Severity.WARN, case_sensitive=False, help="Lowest Reviewer issue severity that triggers a revision pass."
+)
+
+
+def _app_config(
+    llm_cfg: LLMConfig,
+    minimize_diff: bool,
+    run_tests: bool,
+    code_index: bool,
+    related_context: bool,
+    history: bool,
+    history_risk_floor: bool,
+    max_tokens: Optional[int],
+    max_seconds: Optional[float],
+    revise_min_severity: Severity,
+) -> AppConfig:
+    return AppConfig(
+        llm=llm_cfg,
+        minimize_diff=minimize_diff,
+        run_tests=run_tests,
+        code_index=code_index,
+        related_context=related_context,
+        history_index=history,
+        history_risk_floor=history_risk_floor,
+        budget_max_tokens=max_tokens,
+        budget_max_seconds=max_seconds,
+        revision_min_severity=revise_min_severity.value,
+    )
+
+
 @app.command()
 def generate(
     repo: str = typer.Option(".", help="Path to a git repo."),
@@ -51,6 +132,15 @@ def generate(
     redact: bool = typer.Option(
         True, help="Redact secrets/internal IPs in prompts and traces."
     ),
+    minimize_diff: bool = _MINIMIZE_DIFF_OPT,
+    run_tests: bool = _RUN_TESTS_OPT,
+    code_index: bool = _CODE_INDEX_OPT,
+    related_context: bool = _RELATED_CONTEXT_OPT,
+    history: bool = _HISTORY_OPT,
+    history_risk_floor: bool = _HISTORY_RISK_FLOOR_OPT,
+    max_tokens: Optional[int] = _MAX_TOKENS_OPT,
+    max_seconds: Optional[float] = _MAX_SECONDS_OPT,
+    revise_min_severity: Severity = _REVISE_MIN_SEVERITY_OPT,
 ) -> None:
     """Generate a CAB-ready change pack using 3 LLM agents (Impact, Risk, Review)."""
     repo_path = pathlib.Path(repo).resolve()
@@ -58,7 +148,18 @@ def generate(
         raise typer.BadParameter(f"Repo path does not exist: {repo_path}")
 
     llm_cfg = _load_llm_config()
-    cfg = AppConfig(llm=llm_cfg)
+    cfg = _app_config(
+        llm_cfg,
+        minimize_diff=minimize_diff,
+        run_tests=run_tests,
+        code_index=code_index,
+        related_context=related_context,
+        history=history,
+        history_risk_floor=history_risk_floor,
+        max_tokens=max_tokens,
+        max_seconds=max_seconds,
+        revise_min_severity=revise_min_severity,
+    )
 
     git = GitTools(repo_path)
     if not git.is_git_repo():
@@ -83,23 +184,174 @@ def generate(
     user_ctx = UserContext.from_optional_yaml(context_file, title=title, summary=summary)
 
     # LLM client
-    llm = OpenAICompatClient(
-        base_url=llm_cfg.base_url,
-        api_key=llm_cfg.api_key,
-        model=llm_cfg.model,
-        timeout_s=llm_cfg.timeout_s,
-        temperature=llm_cfg.temperature,
-    )
+    llm = _make_llm(llm_cfg)
 
-    pipeline = ChangePackPipeline(cfg=cfg, llm=llm, trace=trace)
+    pipeline = ChangePackPipeline(cfg=cfg, llm=llm, trace=trace, redactor=redactor)
 
     console.print("[cyan][Agentic Pipeline][/cyan] Running agents...")
-    result = pipeline.run(
-        repo_path=repo_path,
-        changed_files=changed_files,
-        diff_text=diff_text,
-        user_ctx=user_ctx,
-        out_dir=run_dir,
-    )
+    try:
+        result = pipeline.run(
+            repo_path=repo_path,
+            changed_files=changed_files,
+            diff_text=diff_text,
+            user_ctx=user_ctx,
+            out_dir=run_dir,
+        )
+    finally:
+        llm.close()
 
     console.print(Panel.fit(f"[green]DONE[/green]\n{result.run_dir}\nFiles: {len(result.files_written)}"))
+
+
+@app.command()
+def watch(
+    repo: str = typer.Option(".", help="Path to a git repo."),
+    diff: str = typer.Option(
+        "auto",
+        help="Diff mode: auto|staged|head|worktree",
+        show_default=True,
+    ),
+    title: Optional[str] = typer.Option(None, help="Human-readable change title."),
+    summary: Optional[str] = typer.Option(None, help="Short change summary."),
+    context_file: Optional[str] = typer.Option(
+        None, help="Optional YAML file with extra context (title/summary/env/links)."
+    ),
+    outdir: str = typer.Option(
+        "docs/change-packs",
+        help="Output base directory (the pack is kept up to date in its 'watch' subfolder).",
+    ),
+    redact: bool = typer.Option(
+        True, help="Redact secrets/internal IPs in prompts and traces."
+    ),
+    minimize_diff: bool = _MINIMIZE_DIFF_OPT,
+    run_tests: bool = _RUN_TESTS_OPT,
+    code_index: bool = _CODE_INDEX_OPT,
+    related_context: bool = _RELATED_CONTEXT_OPT,
+    history: bool = _HISTORY_OPT,
+    history_risk_floor: bool = _HISTORY_RISK_FLOOR_OPT,
+    max_tokens: Optional[int] = _MAX_TOKENS_OPT,
+    max_seconds: Optional[float] = _MAX_SECONDS_OPT,
+    revise_min_severity: Severity = _REVISE_MIN_SEVERITY_OPT,
+    debounce: float = typer.Option(0.5, help="Seconds of quiet before a burst of saves triggers a refresh."),
+    poll: bool = typer.Option(False, help="Force the polling watcher instead of inotify."),
+) -> None:
+    """Keep a change pack continuously up to date while you edit."""
+    repo_path = pathlib.Path(repo).resolve()
+    if not repo_path.exists():
+        raise typer.BadParameter(f"Repo path does not exist: {repo_path}")
+
+    llm_cfg = _load_llm_config()
+    cfg = _app_config(
+        llm_cfg,
+        minimize_diff=minimize_diff,
+        run_tests=run_tests,
+        code_index=code_index,
+        related_context=related_context,
+        history=history,
+        history_risk_floor=history_risk_floor,
+        max_tokens=max_tokens,
+        max_seconds=max_seconds,
+        revise_min_severity=revise_min_severity,
+    )
+
+    git = GitTools(repo_path)
+    if not git.is_git_repo():
+        raise typer.BadParameter(f"Not a git repo: {repo_path}")
+
+    redactor = Redactor(enabled=redact)
+    run_dir = pathlib.Path(outdir).resolve() / "watch"
+    run_dir.mkdir(parents=True, exist_ok=True)
+    trace = TraceWriter(run_dir / "agent-trace.jsonl", redactor=redactor)
+    user_ctx = UserContext.from_optional_yaml(context_file, title=title, summary=summary)
+
+    llm = _make_llm(llm_cfg)
+    pipeline = ChangePackPipeline(cfg=cfg, llm=llm, trace=trace, redactor=redactor)
+    session = WatchSession(pipeline, git, redactor, mode=diff, user_ctx=user_ctx, out_dir=run_dir)
+    watcher = FileWatcher(git, exclude=[run_dir], debounce_s=debounce, force_polling=poll)
+
+    console.print(Panel.fit(f"[bold]AgenticChangeScribe watch[/bold]\nRepo: {repo_path}\nPack: {run_dir}\nWatcher: {watcher.backend_name}"))
+    try:
+        _watch_refresh(session)
+        for _ in watcher.changes():
+            _watch_refresh(session)
+    except KeyboardInterrupt:
+        console.print("[cyan][Watch][/cyan] Stopped.")
+    finally:
+        llm.close()
+
+
+def _watch_refresh(session: WatchSession) -> None:
+    try:
+        result = session.refresh()
+    except Exception as e:  # keep the daemon alive across transient git/LLM failures
+        console.print(f"[red][Watch][/red] Refresh failed: {e}")
+        return
+    if result is None:
+        console.print("[cyan][Watch][/cyan] No diff change; pack is current.")
+    else:
+        console.print(f"[green][Watch][/green] Pack updated ({len(result.files_written)} files).")
+
+
+@app.command()
+def stats(
+    root: str = typer.Option("docs/change-packs", help="Directory tree containing agent-trace.jsonl files."),
+    prices: Optional[str] = typer.Option(
+        None, help="Optional YAML mapping model -> {prompt, completion} USD per 1M tokens ('default' applies to unlisted models)."
+    ),
+    workers: Optional[int] = typer.Option(None, help="Worker processes for large trees (default: CPU count)."),
+    as_json: bool = typer.Option(False, "--json", help="Print machine-readable JSON instead of tables."),
+) -> None:
+    """Aggregate latency, revision, NEEDS_FIX, parse-failure and token/cost stats across runs."""
+    root_path = pathlib.Path(root).resolve()
+    if not root_path.is_dir():
+        raise typer.BadParameter(f"Directory does not exist: {root_path}")
+
+    report = TraceStats(root_path, workers=workers).collect()
+    if prices:
+        report.apply_prices(yaml.safe_load(pathlib.Path(prices).read_text(encoding="utf-8")) or {})
+
+    by_model = {k: StatsReport.summarize(g) for k, g in report.rollup("model").items()}
+    by_day = {k: StatsReport.summarize(g) for k, g in report.rollup("day").items()}
+    if as_json:
+        typer.echo(json.dumps({"files": report.files_total, "scanned": report.files_scanned, "by_model": by_model, "by_day": by_day}, indent=2))
+        return
+
+    console.print(f"[cyan][Stats][/cyan] {report.files_total} traces ({report.files_scanned} scanned, rest from index)")
+    for title, rows in (("By model", by_model), ("By day", by_day)):
+        console.print(_stats_table(title, rows, show_cost=bool(prices)))
+    console.print(_latency_table(by_model))
+
+
+def _stats_table(title: str, rows: dict, show_cost: bool) -> Table:
+    table = Table(title=title)
+    for col in ("", "runs", "rev%", "passes", "fix%", "parse err", "calls", "cached", "tok in", "tok out"):
+        table.add_column(col)
+    if show_cost:
+        table.add_column("USD")
+    for key, r in rows.items():
+        cells = [
+            key,
+            str(r["runs"]),
+            f"{r['revision_rate']:.0%}",
+            f"{r['avg_revision_passes']:.2f}",
+            f"{r['needs_fix_rate']:.0%}",
+            str(r["parse_errors"]),
+            str(r["calls"]),
+            str(r["cached_calls"]),
+            f"{r['prompt_tokens']:,}",
+            f"{r['completion_tokens']:,}",
+        ]
+        if show_cost:
+            cells.append(f"{r['cost']:.4f}")
+        table.add_row(*cells)
+    return table
+
+
+def _latency_table(by_model: dict) -> Table:
+    table = Table(title="Agent latency (s) by model")
+    for col in ("model", "agent", "p50", "p90", "p99"):
+        table.add_column(col)
+    for model, r in by_model.items():
+        for agent, pct in r["latency"].items():
+            table.add_row(model, agent, f"{pct['p50']:.2f}", f"{pct['p90']:.2f}", f"{pct['p99']:.2f}")
+    return table
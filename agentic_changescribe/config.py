@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+from typing import Literal, Optional
+
 from pydantic import BaseModel, Field
 
 
@@ -23,3 +25,49 @@ class AppConfig(BaseModel):
         1,
         description="Max additional revision passes triggered by the Reviewer (MVP default: 1).",
     )
+    minimize_diff: bool = Field(
+        True,
+        description="Collapse generated/vendored/binary/lockfile diffs, drop whitespace-only hunks and trim context before packing evidence.",
+    )
+    diff_context_lines: int = Field(
+        1,
+        description="Unchanged context lines kept around each change when the diff is minimized.",
+    )
+    run_tests: bool = Field(
+        False,
+        description="Execute the recommended test commands locally and feed results to the Risk/Reviewer agents.",
+    )
+    test_timeout_s: float = Field(600.0, description="Per-command wall-clock timeout for executed tests (seconds).")
+    test_max_workers: int = Field(2, description="Max test commands executed concurrently.")
+    test_output_max_bytes: int = Field(64_000, description="Output kept per test command (tail is retained).")
+    code_index: bool = Field(
+        True,
+        description="Maintain a local symbol/import index and add blast-radius evidence for changed symbols.",
+    )
+    related_context: bool = Field(
+        True,
+        description="Maintain a local BM25 index and add unchanged code/config that references identifiers touched by the diff.",
+    )
+    related_context_k: int = Field(6, description="Max related_context snippets added as evidence.")
+    related_context_tokens: int = Field(1500, description="Token budget shared by all related_context snippets.")
+    history_index: bool = Field(
+        True,
+        description="Maintain an incremental git-history index and add per-file hotspot evidence (churn, authors, fixes, reverts, co-change).",
+    )
+    history_max_commits: int = Field(20_000, description="Most recent commits read when the history index is (re)built from scratch.")
+    history_risk_floor: bool = Field(
+        False,
+        description="Raise risk_level to a deterministic floor when changed files are top hotspots (MEDIUM; HIGH with a recent revert).",
+    )
+    budget_max_tokens: Optional[int] = Field(
+        None,
+        description="Token budget for a whole run (prompt + completion). Reviewer and revision calls that would exceed it are skipped or downgraded.",
+    )
+    budget_max_seconds: Optional[float] = Field(
+        None,
+        description="Wall-clock budget for a whole run (seconds), enforced the same way as budget_max_tokens.",
+    )
+    revision_min_severity: Literal["INFO", "WARN", "ERROR"] = Field(
+        "WARN",
+        description="Lowest Reviewer issue severity that triggers a revision pass.",
+    )
@@ -12,9 +12,10 @@ class ChatMessage(BaseModel):
 
 
 class Evidence(BaseModel):
-    type: str = Field(..., description="changed_files|diff_snippet|user_context|review_feedback")
+    type: str = Field(..., description="changed_files|diff_snippet|code_index|related_context|history|test_result|user_context|review_feedback")
     value: str
     note: Optional[str] = None
+    id: Optional[str] = Field(None, description="Short stable ID (E1, E2, ...) that agents cite instead of copying text")
 
 
 class UserContext(BaseModel):
@@ -46,7 +47,8 @@ class ImpactAnalysis(BaseModel):
     change_types: List[str] = Field(default_factory=list)
     key_files: List[str] = Field(default_factory=list)
     assumptions: List[str] = Field(default_factory=list)
-    evidence: List[Evidence] = Field(default_factory=list)
+    citations: List[str] = Field(default_factory=list)
+    evidence: List[Evidence] = Field(default_factory=list, description="Cited evidence, resolved locally by the pipeline")
 
 
 class RiskAssessment(BaseModel):
@@ -55,7 +57,8 @@ class RiskAssessment(BaseModel):
     mitigations: List[str] = Field(default_factory=list)
     monitoring: List[str] = Field(default_factory=list)
     rollback: List[str] = Field(default_factory=list)
-    evidence: List[Evidence] = Field(default_factory=list)
+    citations: List[str] = Field(default_factory=list)
+    evidence: List[Evidence] = Field(default_factory=list, description="Cited evidence, resolved locally by the pipeline")
 
 
 class TestPlan(BaseModel):
@@ -77,6 +80,26 @@ class ReviewResult(BaseModel):
     issues: List[ReviewIssue] = Field(default_factory=list)
 
 
+class BudgetDecision(BaseModel):
+    stage: str = Field(..., description="review|revision")
+    action: str = Field(..., description="run|downgrade|skip")
+    reason: str
+    agents: List[str] = Field(default_factory=list, description="Agents actually called for this stage")
+    est_tokens: int = 0
+    est_seconds: float = 0.0
+
+
+class RunBudget(BaseModel):
+    max_tokens: Optional[int] = None
+    max_seconds: Optional[float] = None
+    min_severity: str = "WARN"
+    tokens_used: int = 0
+    elapsed_s: float = 0.0
+    review_status: str = "UNKNOWN"
+    revision_passes: int = 0
+    decisions: List[BudgetDecision] = Field(default_factory=list)
+
+
 class ChangePackResult(BaseModel):
     run_dir: str
     files_written: List[str] = Field(default_factory=list)
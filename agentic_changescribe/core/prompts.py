@@ -1,21 +1,47 @@
 from __future__ import annotations
 
-from typing import List
+import re
+from typing import Dict, List
 from agentic_changescribe.core.models import Evidence, UserContext
 
 SYSTEM_GUARDRAILS = """You are a meticulous staff-level engineer writing CAB-ready change documents.
 Hard rules:
 - Do NOT invent systems, services, metrics, or tests you cannot justify.
 - If evidence is insufficient, write UNKNOWN and add a TODO.
-- When making a claim, cite evidence using short quoted snippets from the EVIDENCE section.
+- When making a claim, cite evidence by its ID in square brackets (e.g. [E2]) and list the IDs in "citations".
+- Never copy evidence text into your output; IDs are resolved by the tooling.
 - Keep outputs concise and enterprise-friendly.
 """
 
+_ID_RE = re.compile(r"E(\d+)")
+_CITATION_RE = re.compile(r"\bE(\d+)\b")
+
+
+def assign_evidence_ids(evidence: List[Evidence]) -> List[Evidence]:
+    """Give every item without an ID the next free `E<n>`; existing IDs are kept."""
+    used = [int(e.id[1:]) for e in evidence if e.id and _ID_RE.fullmatch(e.id)]
+    next_id = max(used, default=0) + 1
+    for e in evidence:
+        if not e.id:
+            e.id = f"E{next_id}"
+            next_id += 1
+    return evidence
+
+
+def cited_ids(texts: List[str]) -> List[str]:
+    """Evidence IDs referenced in free text, in first-seen order."""
+    seen: Dict[str, None] = {}
+    for text in texts:
+        for m in _CITATION_RE.finditer(text):
+            seen.setdefault(f"E{m.group(1)}", None)
+    return list(seen)
+
+
 def _evidence_block(evidence: List[Evidence]) -> str:
     lines = []
-    for e in evidence:
+    for e in assign_evidence_ids(evidence):
         note = f" ({e.note})" if e.note else ""
-        lines.append(f"- [{e.type}]{note}: {e.value}")
+        lines.append(f"- {e.id} [{e.type}]{note}: {e.value}")
     return "\n".join(lines)
 
 def impact_prompt(evidence: List[Evidence], user_ctx: UserContext) -> str:
@@ -28,6 +54,7 @@ Analyze the change and produce:
 - change types from: code, config, db, infra, contract, docs
 - key files (top 5)
 - assumptions (if any)
+related_context evidence is unchanged code/config that mentions identifiers touched by the diff; use it to judge whether other callers or consumers are affected.
 
 Return as JSON matching this schema:
 {{
@@ -36,7 +63,7 @@ Return as JSON matching this schema:
   \"change_types\": [\"string\"],
   \"key_files\": [\"string\"],
   \"assumptions\": [\"string\"],
-  \"evidence\": [{{\"type\":\"changed_files|diff_snippet|user_context\",\"value\":\"string\",\"note\":\"string?\"}}]
+  \"citations\": [\"E1\"]
 }}
 
 USER CONTEXT:
@@ -60,6 +87,8 @@ Given the Impact Analysis JSON and evidence, produce:
 - mitigations
 - monitoring metrics/checks (if unknown, propose generic but label as suggestion)
 - rollback steps (specific if possible; else TODO)
+Use related_context evidence (unchanged code/config that mentions changed identifiers) to spot consumers that may break.
+Treat history evidence (hotspot score, recent fixes/reverts, files that usually change together but are missing from this change) as a prior, not proof.
 
 Return as JSON matching this schema:
 {{
@@ -68,7 +97,7 @@ Return as JSON matching this schema:
   \"mitigations\": [\"string\"],
   \"monitoring\": [\"string\"],
   \"rollback\": [\"string\"],
-  \"evidence\": [{{\"type\":\"changed_files|diff_snippet|user_context\",\"value\":\"string\",\"note\":\"string?\"}}]
+  \"citations\": [\"E1\"]
 }}
 
 USER CONTEXT:
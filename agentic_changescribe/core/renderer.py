@@ -1,9 +1,13 @@
 from __future__ import annotations
 
+import os
 from pathlib import Path
-from typing import List
+from typing import List, Optional
 
-from agentic_changescribe.core.models import ImpactAnalysis, RiskAssessment, TestPlan, UserContext
+from agentic_changescribe.core.models import Evidence, ImpactAnalysis, RiskAssessment, RunBudget, TestPlan, UserContext
+
+
+_DIFF_HEADER_PREFIXES = ("== ", "diff --git ", "index ", "--- ", "+++ ", "@@")
 
 
 class MarkdownRenderer:
@@ -17,10 +21,11 @@ class MarkdownRenderer:
         impact: ImpactAnalysis,
         risk: RiskAssessment,
         test_plan: TestPlan,
+        budget: Optional[RunBudget] = None,
     ) -> List[str]:
         out_dir.mkdir(parents=True, exist_ok=True)
         files: List[str] = []
-        files.append(MarkdownRenderer._write(out_dir / "change-brief.md", MarkdownRenderer.change_brief(user_ctx, impact, risk, test_plan)))
+        files.append(MarkdownRenderer._write(out_dir / "change-brief.md", MarkdownRenderer.change_brief(user_ctx, impact, risk, test_plan, budget)))
         files.append(MarkdownRenderer._write(out_dir / "impact-analysis.md", MarkdownRenderer.impact_doc(changed_files, impact)))
         files.append(MarkdownRenderer._write(out_dir / "risk-assessment.md", MarkdownRenderer.risk_doc(risk)))
         files.append(MarkdownRenderer._write(out_dir / "test-plan.md", MarkdownRenderer.test_doc(test_plan)))
@@ -29,14 +34,50 @@ class MarkdownRenderer:
 
     @staticmethod
     def _write(path: Path, content: str) -> str:
-        path.write_text(content, encoding="utf-8")
+        # Write-then-rename so readers (and watch mode rewrites) never see a partial file.
+        tmp = path.with_name(f".{path.name}.tmp")
+        tmp.write_text(content, encoding="utf-8")
+        os.replace(tmp, path)
         return str(path)
 
     @staticmethod
-    def change_brief(user_ctx: UserContext, impact: ImpactAnalysis, risk: RiskAssessment, test_plan: TestPlan) -> str:
+    def _evidence_lines(evidence: List[Evidence], excerpt_chars: int = 160) -> str:
+        if not evidence:
+            return "- (no evidence cited)"
+        lines = []
+        for e in evidence:
+            first = next((ln.strip() for ln in e.value.splitlines() if ln.strip() and not ln.startswith(_DIFF_HEADER_PREFIXES)), "")
+            excerpt = first if len(first) <= excerpt_chars else first[:excerpt_chars] + "..."
+            note = f" ({e.note})" if e.note else ""
+            lines.append(f"- **{e.id}** `{e.type}`{note}: {excerpt}")
+        return "\n".join(lines)
+
+    @staticmethod
+    def _budget_lines(budget: RunBudget) -> str:
+        tokens = f"{budget.tokens_used:,}" + (f" of {budget.max_tokens:,}" if budget.max_tokens is not None else "")
+        seconds = f"{budget.elapsed_s:.1f}s" + (f" of {budget.max_seconds:g}s" if budget.max_seconds is not None else "")
+        lines = [
+            f"- Reviewer: **{budget.review_status}** after {budget.revision_passes} revision pass(es)",
+            f"- Tokens: {tokens}; time: {seconds}; revisions need severity >= {budget.min_severity}",
+        ]
+        for d in budget.decisions:
+            agents = f" [{', '.join(d.agents)}]" if d.agents else ""
+            est = f"; est. ~{d.est_tokens:,} tokens" if d.est_tokens else ""
+            lines.append(f"- {d.stage}: {d.action}{agents} ({d.reason}{est})")
+        return "\n".join(lines)
+
+    @staticmethod
+    def change_brief(
+        user_ctx: UserContext,
+        impact: ImpactAnalysis,
+        risk: RiskAssessment,
+        test_plan: TestPlan,
+        budget: Optional[RunBudget] = None,
+    ) -> str:
         title = user_ctx.title or "Change Brief"
         summary = user_ctx.summary or impact.summary
         env = user_ctx.environment or "UNKNOWN"
+        review = ["## Review & Budget", MarkdownRenderer._budget_lines(budget), ""] if budget else []
 
         return "\n".join([
             f"# {title}",
@@ -68,6 +109,7 @@ class MarkdownRenderer:
             "## Monitoring (suggested)",
             "\n".join([f"- {m}" for m in (risk.monitoring or ["TODO: add monitoring metrics"])]),
             "",
+            *review,
             f"**Environment:** {env}",
             "",
         ])
@@ -89,6 +131,9 @@ class MarkdownRenderer:
             "## Assumptions",
             "\n".join([f"- {a}" for a in (impact.assumptions or ["(none)"])]),
             "",
+            "## Cited Evidence",
+            MarkdownRenderer._evidence_lines(impact.evidence),
+            "",
         ])
 
     @staticmethod
@@ -107,6 +152,9 @@ class MarkdownRenderer:
             "## Monitoring Suggestions",
             "\n".join([f"- {m}" for m in (risk.monitoring or ["TODO"])]),
             "",
+            "## Cited Evidence",
+            MarkdownRenderer._evidence_lines(risk.evidence),
+            "",
         ])
 
     @staticmethod
@@ -0,0 +1,304 @@
+from __future__ import annotations
+
+import datetime as dt
+import hashlib
+import json
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+INDEX_VERSION = 2
+HEAD_BYTES = 4096
+TRACE_NAME = "agent-trace.jsonl"
+PARALLEL_THRESHOLD = 64
+_LLM_AGENTS = ("impact", "risk", "review")
+
+
+def _new_group() -> Dict[str, Any]:
+    return {
+        "runs": 0,
+        "revision_runs": 0,
+        "revision_passes": 0,
+        "reviews": 0,
+        "needs_fix": 0,
+        "parse_errors": 0,
+        "calls": 0,
+        "cached_calls": 0,
+        "prompt_tokens": 0,
+        "completion_tokens": 0,
+        "cost": 0.0,
+        "latency": {},
+    }
+
+
+def _new_state() -> Dict[str, Any]:
+    return {"model": "unknown", "in_run": False, "run_revisions": 0, "reviews_in_run": 0, "pending": {}}
+
+
+def _parse_ts(ts: Optional[str]) -> Optional[dt.datetime]:
+    if not ts:
+        return None
+    try:
+        return dt.datetime.fromisoformat(ts.rstrip("Z"))
+    except ValueError:
+        return None
+
+
+def scan_trace(path: str, offset: int = 0, state: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Stream one trace file from `offset`, returning mergeable per-(model, day) aggregates.
+
+    Only complete lines are consumed; the returned offset/state let a later
+    scan resume where this one stopped (watch-mode traces keep growing).
+    """
+    st = state or _new_state()
+    groups: Dict[str, Dict[str, Any]] = {}
+    with open(path, "rb") as f:
+        f.seek(offset)
+        for raw in f:
+            if not raw.endswith(b"\n"):
+                break
+            offset += len(raw)
+            try:
+                event = json.loads(raw)
+            except ValueError:
+                continue
+            if isinstance(event, dict):
+                _apply_event(event, st, groups)
+    return {"offset": offset, "state": st, "groups": groups}
+
+
+def _apply_event(event: Dict[str, Any], st: Dict[str, Any], groups: Dict[str, Dict[str, Any]]) -> None:
+    agent, kind = event.get("agent"), event.get("event")
+    ts = event.get("ts") or ""
+    if agent == "pipeline" and kind == "start":
+        st.update(model=event.get("model") or "unknown", in_run=False)
+    key = f"{st['model']}|{ts[:10] or 'unknown'}"
+
+    if not st["in_run"] and ((agent == "pipeline" and kind == "start") or agent in _LLM_AGENTS):
+        st.update(in_run=True, run_revisions=0, reviews_in_run=0, pending={})
+        groups.setdefault(key, _new_group())["runs"] += 1
+    g = groups.setdefault(key, _new_group())
+
+    if agent == "pipeline":
+        if kind == "revision":
+            _count_revision(st, g)
+        elif kind == "end":
+            st["in_run"] = False
+        return
+    if agent not in _LLM_AGENTS:
+        return
+
+    if kind == "call":
+        st["pending"][agent] = ts
+        if agent == "review":
+            st["reviews_in_run"] += 1
+            # Older traces have no explicit revision events: every review after
+            # the first one in a run is a revision pass.
+            if st["reviews_in_run"] > 1 and st["run_revisions"] < st["reviews_in_run"] - 1:
+                _count_revision(st, g)
+        return
+    if kind not in ("result", "parse_error"):
+        return
+
+    if kind == "parse_error":
+        g["parse_errors"] += 1
+    latency = event.get("latency_s")
+    if latency is None:
+        started, ended = _parse_ts(st["pending"].get(agent)), _parse_ts(ts)
+        if started and ended:
+            latency = (ended - started).total_seconds()
+    st["pending"].pop(agent, None)
+
+    g["calls"] += 1
+    if event.get("cached"):
+        g["cached_calls"] += 1
+    else:
+        if latency is not None:
+            g["latency"].setdefault(agent, []).append(round(float(latency), 3))
+        usage = event.get("usage") or {}
+        g["prompt_tokens"] += int(usage.get("prompt_tokens") or event.get("prompt_tokens_est") or 0)
+        g["completion_tokens"] += int(usage.get("completion_tokens") or event.get("completion_tokens_est") or 0)
+
+    if agent == "review" and kind == "result":
+        g["reviews"] += 1
+        if _review_status(event.get("response")) == "NEEDS_FIX":
+            g["needs_fix"] += 1
+
+
+def _count_revision(st: Dict[str, Any], g: Dict[str, Any]) -> None:
+    st["run_revisions"] += 1
+    g["revision_passes"] += 1
+    if st["run_revisions"] == 1:
+        g["revision_runs"] += 1
+
+
+def _review_status(response: Any) -> Optional[str]:
+    if not isinstance(response, str):
+        return None
+    try:
+        status = json.loads(response).get("status")
+    except (ValueError, AttributeError):
+        return None
+    return status.strip().upper() if isinstance(status, str) else None
+
+
+def _head_hash(path: str, length: int) -> str:
+    """Hash of the first `length` bytes, used to tell an append from a replaced file."""
+    with open(path, "rb") as f:
+        return hashlib.sha1(f.read(length)).hexdigest()
+
+
+def _merge_group(into: Dict[str, Any], g: Dict[str, Any]) -> None:
+    for k, v in g.items():
+        if k == "latency":
+            for agent, values in v.items():
+                into["latency"].setdefault(agent, []).extend(values)
+        else:
+            into[k] += v
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100.0 * len(values)))
+    return values[min(rank, len(values)) - 1]
+
+
+@dataclass
+class StatsReport:
+    groups: Dict[Tuple[str, str], Dict[str, Any]] = field(default_factory=dict)
+    files_total: int = 0
+    files_scanned: int = 0
+
+    def apply_prices(self, prices: Dict[str, Dict[str, float]]) -> None:
+        """Set each group's cost from USD-per-1M-token prices keyed by model."""
+        for (model, _), g in self.groups.items():
+            p = prices.get(model) or prices.get("default") or {}
+            g["cost"] = g["prompt_tokens"] / 1e6 * p.get("prompt", 0.0) + g["completion_tokens"] / 1e6 * p.get("completion", 0.0)
+
+    def rollup(self, by: str) -> Dict[str, Dict[str, Any]]:
+        """Aggregate (model, day) groups by "model" or "day"."""
+        out: Dict[str, Dict[str, Any]] = {}
+        for (model, day), g in sorted(self.groups.items()):
+            _merge_group(out.setdefault(model if by == "model" else day, _new_group()), g)
+        return out
+
+    @staticmethod
+    def summarize(g: Dict[str, Any]) -> Dict[str, Any]:
+        runs = g["runs"] or 1
+        row: Dict[str, Any] = {
+            "runs": g["runs"],
+            "revision_rate": g["revision_runs"] / runs,
+            "avg_revision_passes": g["revision_passes"] / runs,
+            "needs_fix_rate": g["needs_fix"] / g["reviews"] if g["reviews"] else 0.0,
+            "parse_errors": g["parse_errors"],
+            "calls": g["calls"],
+            "cached_calls": g["cached_calls"],
+            "prompt_tokens": g["prompt_tokens"],
+            "completion_tokens": g["completion_tokens"],
+            "cost": round(g["cost"], 4),
+            "latency": {},
+        }
+        for agent, values in sorted(g["latency"].items()):
+            vals = sorted(values)
+            row["latency"][agent] = {p: round(percentile(vals, n), 3) for p, n in (("p50", 50), ("p90", 90), ("p99", 99))}
+        return row
+
+
+class TraceStats:
+    """Incremental analytics over every agent-trace.jsonl below a directory.
+
+    Per-file aggregates are kept in an on-disk index keyed by path; files whose
+    inode, size and mtime are unchanged are not read again, and files that
+    grew with the same inode and leading bytes are resumed from the last
+    consumed byte offset. Anything else is rescanned from the start.
+    """
+
+    def __init__(self, root: Path, index_path: Optional[Path] = None, workers: Optional[int] = None) -> None:
+        self.root = root
+        self.index_path = index_path or root / ".agent-trace-index.json"
+        self.workers = workers
+
+    def collect(self) -> StatsReport:
+        index = self._load()
+        files: Dict[str, Any] = {}
+        todo: List[Tuple[str, int, Optional[Dict[str, Any]], os.stat_result]] = []
+        for path in self._iter_traces():
+            st = path.stat()
+            key = str(path.relative_to(self.root))
+            prev = index.get(key)
+            same_file = bool(prev) and prev["inode"] == st.st_ino
+            if same_file and prev["size"] == st.st_size and prev["mtime_ns"] == st.st_mtime_ns:
+                files[key] = prev
+            elif same_file and st.st_size > prev["size"] and self._same_head(path, prev):
+                todo.append((key, prev["offset"], prev, st))
+            else:
+                todo.append((key, 0, None, st))
+
+        args = [(str(self.root / key), offset, prev["state"] if prev else None) for key, offset, prev, _ in todo]
+        if len(args) >= PARALLEL_THRESHOLD and (self.workers or 0) != 1:
+            with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                results = list(pool.map(_scan_star, args, chunksize=16))
+        else:
+            results = [_scan_star(a) for a in args]
+
+        for (key, _, prev, st), res in zip(todo, results):
+            groups = {k: dict(v, latency={a: list(l) for a, l in v["latency"].items()}) for k, v in (prev or {}).get("groups", {}).items()}
+            for k, g in res["groups"].items():
+                _merge_group(groups.setdefault(k, _new_group()), g)
+            head_len = min(res["offset"], HEAD_BYTES)
+            files[key] = {
+                "inode": st.st_ino,
+                "size": st.st_size,
+                "mtime_ns": st.st_mtime_ns,
+                "head": _head_hash(str(self.root / key), head_len),
+                "head_len": head_len,
+                "offset": res["offset"],
+                "state": res["state"],
+                "groups": groups,
+            }
+
+        if todo or len(files) != len(index):
+            self._save(files)
+
+        report = StatsReport(files_total=len(files), files_scanned=len(todo))
+        for entry in files.values():
+            for k, g in entry["groups"].items():
+                model, _, day = k.partition("|")
+                _merge_group(report.groups.setdefault((model, day), _new_group()), g)
+        return report
+
+    def _iter_traces(self) -> Iterator[Path]:
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            dirnames[:] = [d for d in dirnames if not d.startswith(".")]
+            if TRACE_NAME in filenames:
+                yield Path(dirpath) / TRACE_NAME
+
+    @staticmethod
+    def _same_head(path: Path, prev: Dict[str, Any]) -> bool:
+        try:
+            return _head_hash(str(path), prev["head_len"]) == prev["head"]
+        except OSError:
+            return False
+
+    def _load(self) -> Dict[str, Any]:
+        try:
+            data = json.loads(self.index_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+        if data.get("version") != INDEX_VERSION:
+            return {}
+        return data.get("files", {})
+
+    def _save(self, files: Dict[str, Any]) -> None:
+        tmp = self.index_path.with_name(self.index_path.name + ".tmp")
+        tmp.write_text(json.dumps({"version": INDEX_VERSION, "files": files}, separators=(",", ":")), encoding="utf-8")
+        os.replace(tmp, self.index_path)
+
+
+def _scan_star(args: Tuple[str, int, Optional[Dict[str, Any]]]) -> Dict[str, Any]:
+    return scan_trace(*args)
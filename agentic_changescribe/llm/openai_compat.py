@@ -25,6 +25,19 @@ class OpenAICompatClient(LLMClient):
         self.timeout_s = timeout_s
         self.temperature = temperature
         self.extra_headers = extra_headers or {}
+        self.last_usage: Optional[Dict[str, Any]] = None
+        self._client: Optional[httpx.Client] = None
+
+    def _http(self) -> httpx.Client:
+        # Kept open across calls so repeated agent calls reuse the connection.
+        if self._client is None:
+            self._client = httpx.Client(timeout=self.timeout_s)
+        return self._client
+
+    def close(self) -> None:
+        if self._client is not None:
+            self._client.close()
+            self._client = None
 
     def chat(self, messages: Sequence[ChatMessage]) -> str:
         url = f"{self.base_url}/v1/chat/completions"
@@ -39,11 +52,11 @@ class OpenAICompatClient(LLMClient):
             "messages": [{"role": m.role, "content": m.content} for m in messages],
         }
 
-        with httpx.Client(timeout=self.timeout_s) as client:
-            resp = client.post(url, headers=headers, json=payload)
-            resp.raise_for_status()
-            data = resp.json()
+        resp = self._http().post(url, headers=headers, json=payload)
+        resp.raise_for_status()
+        data = resp.json()
 
+        self.last_usage = data.get("usage") if isinstance(data, dict) else None
         try:
             return data["choices"][0]["message"]["content"]
         except Exception as e:
@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from agentic_changescribe.core.models import BudgetDecision, ReviewIssue, RunBudget
+from agentic_changescribe.tools.diff_minimizer import chars_to_tokens
+
+SEVERITY_RANK = {"INFO": 0, "WARN": 1, "ERROR": 2}
+_DEFAULT_COMPLETION_TOKENS = 800
+
+
+def severity_rank(severity: str) -> int:
+    return SEVERITY_RANK.get((severity or "").strip().upper(), SEVERITY_RANK["WARN"])
+
+
+@dataclass
+class CallEstimate:
+    agent: str
+    tokens: int
+    seconds: float
+
+
+class BudgetGovernor:
+    """Tracks a run's token and wall-clock spend and decides which optional calls still fit.
+
+    Impact and Risk always run (the pack needs them); the Reviewer and every
+    revision pass are optional and are skipped or downgraded when their
+    estimated cost exceeds what is left, or when the Reviewer only raised
+    issues below `min_severity`.
+    """
+
+    def __init__(self, max_tokens: Optional[int] = None, max_seconds: Optional[float] = None, min_severity: str = "WARN") -> None:
+        self.max_tokens = max_tokens
+        self.max_seconds = max_seconds
+        self.min_severity = min_severity.strip().upper()
+        self.tokens_used = 0
+        self.decisions: List[BudgetDecision] = []
+        self._started = time.monotonic()
+        self._latency: Dict[str, float] = {}
+        self._completion_tokens: Dict[str, int] = {}
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self._started
+
+    def remaining_tokens(self) -> Optional[int]:
+        return None if self.max_tokens is None else self.max_tokens - self.tokens_used
+
+    def remaining_seconds(self) -> Optional[float]:
+        return None if self.max_seconds is None else self.max_seconds - self.elapsed()
+
+    def record(self, agent: str, usage: Dict[str, Any], latency_s: float) -> None:
+        """Account for a finished call (`usage` is the pipeline's per-call usage record)."""
+        if usage.get("cached"):
+            return
+        reported = usage.get("usage") or {}
+        prompt = int(reported.get("prompt_tokens") or usage.get("prompt_tokens_est") or 0)
+        completion = int(reported.get("completion_tokens") or usage.get("completion_tokens_est") or 0)
+        self.tokens_used += int(reported.get("total_tokens") or prompt + completion)
+        self._completion_tokens[agent] = completion
+        self._latency[agent] = latency_s
+
+    def estimate(self, agent: str, prompt_chars: int) -> CallEstimate:
+        """Prompt size is known exactly; completion size and latency come from this run's history."""
+        completion = self._completion_tokens.get(agent, _DEFAULT_COMPLETION_TOKENS)
+        seen = list(self._latency.values())
+        seconds = self._latency.get(agent, sum(seen) / len(seen) if seen else 0.0)
+        return CallEstimate(agent=agent, tokens=chars_to_tokens(prompt_chars) + completion, seconds=seconds)
+
+    def fits(self, estimates: List[CallEstimate]) -> bool:
+        tokens = self.remaining_tokens()
+        seconds = self.remaining_seconds()
+        if tokens is not None and sum(e.tokens for e in estimates) > tokens:
+            return False
+        if seconds is not None and sum(e.seconds for e in estimates) > seconds:
+            return False
+        return True
+
+    def relevant_issues(self, issues: List[ReviewIssue]) -> List[ReviewIssue]:
+        floor = severity_rank(self.min_severity)
+        return [i for i in issues if severity_rank(i.severity) >= floor]
+
+    def check_review(self, estimate: CallEstimate) -> BudgetDecision:
+        if self.fits([estimate]):
+            return self._decide("review", "run", "within budget", [estimate])
+        return self._decide("review", "skip", "over budget", [estimate], run=False)
+
+    def plan_revision(self, issues: List[ReviewIssue], estimates: Dict[str, CallEstimate]) -> BudgetDecision:
+        """Pick the largest revision pass that fits.
+
+        Ladder: rerun every routed agent and re-review; rerun them without the
+        confirming review; rerun only the agent with the most severe issue;
+        otherwise skip. `estimates` must cover every routed agent and "review".
+        """
+        relevant = self.relevant_issues(issues)
+        if not relevant:
+            return self._decide("revision", "skip", f"no issues at or above {self.min_severity}", [])
+
+        worst: Dict[str, int] = {}
+        for i in relevant:
+            if i.route_to in ("impact", "risk"):
+                worst[i.route_to] = max(worst.get(i.route_to, -1), severity_rank(i.severity))
+        targets = [a for a in ("impact", "risk") if a in worst]
+        if not targets:
+            return self._decide("revision", "skip", "no issues routed to impact/risk", [])
+
+        top = max(targets, key=lambda a: worst[a])
+        ladder = [
+            ("run", "within budget", [*targets, "review"]),
+            ("downgrade", "re-review does not fit budget", targets),
+            ("downgrade", f"only {top} revision fits budget", [top]),
+        ]
+        planned: List[CallEstimate] = []
+        for action, reason, agents in ladder:
+            planned = [estimates[a] for a in agents]
+            if self.fits(planned):
+                return self._decide("revision", action, reason, planned)
+        return self._decide("revision", "skip", "over budget", planned, run=False)
+
+    def report(self, review_status: str, revision_passes: int) -> RunBudget:
+        return RunBudget(
+            max_tokens=self.max_tokens,
+            max_seconds=self.max_seconds,
+            min_severity=self.min_severity,
+            tokens_used=self.tokens_used,
+            elapsed_s=round(self.elapsed(), 3),
+            review_status=review_status,
+            revision_passes=revision_passes,
+            decisions=list(self.decisions),
+        )
+
+    def _decide(self, stage: str, action: str, reason: str, planned: List[CallEstimate], run: bool = True) -> BudgetDecision:
+        """`planned` is what was (or, when `run` is False, would have been) called."""
+        decision = BudgetDecision(
+            stage=stage,
+            action=action,
+            reason=reason,
+            agents=[e.agent for e in planned] if run else [],
+            est_tokens=sum(e.tokens for e in planned),
+            est_seconds=round(sum(e.seconds for e in planned), 3),
+        )
+        self.decisions.append(decision)
+        return decision
@@ -1,27 +1,58 @@
 from __future__ import annotations
 
 import datetime as dt
+import hashlib
+import json
+import sqlite3
+import subprocess
+import time
 from pathlib import Path
-from typing import List
+from typing import Any, Callable, Dict, List, Optional, Tuple, TypeVar
 
 from agentic_changescribe.config import AppConfig
-from agentic_changescribe.core.models import Evidence, UserContext, ImpactAnalysis, RiskAssessment, TestPlan, ChangePackResult
+from agentic_changescribe.core.models import BudgetDecision, Evidence, UserContext, ImpactAnalysis, RiskAssessment, ReviewResult, TestPlan, ChangePackResult
+from agentic_changescribe.core.prompts import assign_evidence_ids, cited_ids
 from agentic_changescribe.core.renderer import MarkdownRenderer
 from agentic_changescribe.core.tracing import TraceWriter
 from agentic_changescribe.llm.base import LLMClient
+from agentic_changescribe.agents.base import Agent
 from agentic_changescribe.agents.impact import ImpactAgent
 from agentic_changescribe.agents.risk import RiskAgent
 from agentic_changescribe.agents.review import ReviewerAgent
+from agentic_changescribe.orchestration.budget import BudgetGovernor, CallEstimate
+from agentic_changescribe.tools.code_index import BlastRadius, CodeIndex, language_for
+from agentic_changescribe.tools.diff_minimizer import DiffMinimizer, chars_to_tokens
+from agentic_changescribe.tools.git_tools import GitTools
+from agentic_changescribe.tools.history import RISK_RANK, HistoryIndex, HotspotReport
+from agentic_changescribe.tools.projects import ProjectDetector
+from agentic_changescribe.tools.redaction import Redactor
+from agentic_changescribe.tools.retrieval import RetrievalIndex, Snippet, indexable
+from agentic_changescribe.tools.test_runner import PendingTests, TestRunner, TestRunResult
+
+
+T = TypeVar("T")
 
 
 class ChangePackPipeline:
-    def __init__(self, cfg: AppConfig, llm: LLMClient, trace: TraceWriter) -> None:
+    def __init__(self, cfg: AppConfig, llm: LLMClient, trace: TraceWriter, redactor: Optional[Redactor] = None) -> None:
         self.cfg = cfg
         self.llm = llm
         self.trace = trace
+        # Applied to evidence the pipeline gathers itself (test output, related code); defaults to the trace's redactor.
+        self.redactor = redactor if redactor is not None else trace.redactor
         self.impact_agent = ImpactAgent(llm)
         self.risk_agent = RiskAgent(llm)
         self.reviewer_agent = ReviewerAgent(llm)
+        self.budget: Optional[BudgetGovernor] = None
+        self.risk_floor: Optional[Tuple[str, str]] = None
+        self.stage_cache: Optional[Dict[str, Tuple[str, Any]]] = None
+
+    def enable_memo(self) -> None:
+        """Long-running (watch) mode: reuse agent results for identical prompts and
+        deterministic stage results (code index, BM25, history, tests) whose inputs did not change."""
+        for agent in (self.impact_agent, self.risk_agent, self.reviewer_agent):
+            agent.enable_memo()
+        self.stage_cache = {}
 
     @staticmethod
     def make_run_dir(base_out: Path) -> Path:
@@ -38,34 +69,117 @@ class ChangePackPipeline:
         user_ctx: UserContext,
         out_dir: Path,
     ) -> ChangePackResult:
-        evidence = self._build_evidence(changed_files, diff_text, user_ctx)
+        self.trace.write({"agent": "pipeline", "event": "start", "model": getattr(self.llm, "model", None)})
+        self.budget = budget = BudgetGovernor(
+            max_tokens=self.cfg.budget_max_tokens,
+            max_seconds=self.cfg.budget_max_seconds,
+            min_severity=self.cfg.revision_min_severity,
+        )
+        git = GitTools(repo_path)
+        state = self._repo_state(git) if self.stage_cache is not None else None
+        head = git.head_sha() if state is not None else None
+
+        def key(*parts: Any) -> Optional[str]:
+            return _fingerprint(head, *parts) if state is not None else None
+
+        def files(keep: Callable[[str], bool]) -> Dict[str, str]:
+            return {p: sha for p, sha in (state or {}).items() if keep(p)}
 
-        impact = self._call_impact(evidence, user_ctx)
-        impact_json = impact.model_dump_json(indent=2, ensure_ascii=False)
+        blast = None
+        if self.cfg.code_index:
+            blast_key = key([f for f in changed_files if language_for(f)], files(lambda p: bool(language_for(p))))
+            blast = self._stage("code_index", blast_key, lambda: self._blast_radius(git, changed_files, diff_text))
+        if self.cfg.minimize_diff:
+            diff_text = self._minimize_diff(git, diff_text)
+        related: List[Snippet] = []
+        if self.cfg.related_context:
+            related_key = key(changed_files, diff_text, files(indexable))
+            related = self._stage("retrieval", related_key, lambda: self._related_context(git, changed_files, diff_text))
+        hotspots = None
+        if self.cfg.history_index:
+            hotspots = self._stage("history", key(changed_files), lambda: self._hotspots(git, changed_files))
+        self.risk_floor = hotspots.risk_floor() if hotspots and self.cfg.history_risk_floor else None
+        evidence = self._build_evidence(changed_files, diff_text, user_ctx, blast=blast, related=related, hotspots=hotspots)
+
+        # Tests (opt-in) run in the background while the Impact Agent is busy;
+        # their results are joined in before the Risk/Reviewer calls.
+        # In watch mode each command is keyed by the files of the project it tests.
+        test_plan, test_roots = self._make_test_plan(git, changed_files)
+        test_keys = {c: key(c, files(lambda p: not root or p.startswith(root + "/"))) for c, root in test_roots.items()}
+        test_results: Dict[str, TestRunResult] = {}
+        pending = None
+        if self.cfg.run_tests:
+            for c, k in test_keys.items():
+                hit = self._cached(f"tests:{c}", k)
+                if hit is not None:
+                    test_results[c] = hit
+            to_run = [c for c in test_plan.recommended_commands if c not in test_results]
+            pending = self._start_tests(repo_path, to_run) if to_run else None
+
+        try:
+            impact = self._call_impact(evidence, user_ctx)
+            impact_json = impact.model_dump_json(exclude={"evidence"}, ensure_ascii=False)
+
+            if pending is not None:
+                for r in self._collect_tests(pending):
+                    test_results[r.command] = self._remember(f"tests:{r.command}", test_keys.get(r.command), r)
+            if self.cfg.run_tests:
+                ordered = [test_results[c] for c in test_plan.recommended_commands if c in test_results]
+                evidence = assign_evidence_ids(evidence + self._test_evidence(ordered, test_plan))
+        finally:
+            # No-op once collected; kills the still-running tests if the Impact call failed.
+            if pending is not None:
+                pending.cancel()
 
         risk = self._call_risk(evidence, impact_json, user_ctx)
-        risk_json = risk.model_dump_json(indent=2, ensure_ascii=False)
+        risk_json = risk.model_dump_json(exclude={"evidence"}, ensure_ascii=False)
 
-        review = self._call_review(evidence, impact_json, risk_json, user_ctx)
+        # The Reviewer and every revision pass are optional: the governor
+        # skips or downgrades them when they do not fit the run's budget.
+        review: Optional[ReviewResult] = None
+        review_est = self._estimate(self.reviewer_agent, evidence=evidence, impact_json=impact_json, risk_json=risk_json, user_ctx=user_ctx)
+        if self._decide(budget.check_review(review_est)).action != "skip":
+            review = self._call_review(evidence, impact_json, risk_json, user_ctx)
+        review_status = review.status if review else "SKIPPED"
 
         revision_passes = 0
-        while review.status == "NEEDS_FIX" and revision_passes < self.cfg.max_revision_passes:
+        while review is not None and review.status == "NEEDS_FIX" and revision_passes < self.cfg.max_revision_passes:
+            # Only issues at or above the configured severity are sent back.
+            feedback = review.model_copy(update={"issues": budget.relevant_issues(review.issues)}).model_dump()
+            estimates = {
+                "impact": self._estimate(self.impact_agent, evidence=self._with_feedback(evidence, feedback), user_ctx=user_ctx),
+                "risk": self._estimate(self.risk_agent, evidence=self._with_feedback(evidence, feedback), impact_json=impact_json, user_ctx=user_ctx),
+                "review": self._estimate(self.reviewer_agent, evidence=evidence, impact_json=impact_json, risk_json=risk_json, user_ctx=user_ctx),
+            }
+            decision = self._decide(budget.plan_revision(review.issues, estimates))
+            if decision.action == "skip":
+                break
             revision_passes += 1
-            rerun_impact = any(i.route_to == "impact" for i in review.issues)
-            rerun_risk = any(i.route_to == "risk" for i in review.issues)
+            self.trace.write({"agent": "pipeline", "event": "revision", "pass": revision_passes, "agents": decision.agents})
 
-            if rerun_impact:
-                impact = self._call_impact(evidence, user_ctx, review_feedback=review.model_dump())
-                impact_json = impact.model_dump_json(indent=2, ensure_ascii=False)
+            if "impact" in decision.agents:
+                impact = self._call_impact(evidence, user_ctx, review_feedback=feedback)
+                impact_json = impact.model_dump_json(exclude={"evidence"}, ensure_ascii=False)
 
-            if rerun_risk:
-                risk = self._call_risk(evidence, impact_json, user_ctx, review_feedback=review.model_dump())
-                risk_json = risk.model_dump_json(indent=2, ensure_ascii=False)
+            if "risk" in decision.agents:
+                risk = self._call_risk(evidence, impact_json, user_ctx, review_feedback=feedback)
+                risk_json = risk.model_dump_json(exclude={"evidence"}, ensure_ascii=False)
 
+            if "review" not in decision.agents:
+                review_status = "UNVERIFIED"
+                break
             review = self._call_review(evidence, impact_json, risk_json, user_ctx)
+            review_status = review.status
 
-        test_plan = self._make_test_plan(repo_path)
-
+        run_budget = budget.report(review_status, revision_passes)
+        self.trace.write({
+            "agent": "pipeline",
+            "event": "end",
+            "revision_passes": revision_passes,
+            "review_status": review_status,
+            "tokens_used": run_budget.tokens_used,
+            "elapsed_s": run_budget.elapsed_s,
+        })
         files = MarkdownRenderer.write_all(
             out_dir=out_dir,
             user_ctx=user_ctx,
@@ -73,56 +187,270 @@ class ChangePackPipeline:
             impact=impact,
             risk=risk,
             test_plan=test_plan,
+            budget=run_budget,
         )
         return ChangePackResult(run_dir=str(out_dir), files_written=files)
 
-    def _build_evidence(self, changed_files: List[str], diff_text: str, user_ctx: UserContext) -> List[Evidence]:
+    def _blast_radius(self, git: GitTools, changed_files: List[str], diff_text: str) -> Optional[BlastRadius]:
+        index = CodeIndex(git)
+        try:
+            index.refresh()
+            blast = index.blast_radius(changed_files, diff_text)
+        except (subprocess.CalledProcessError, OSError, sqlite3.Error) as e:
+            self.trace.write({"agent": "code_index", "event": "error", "error": str(e)})
+            return None
+        finally:
+            index.close()
+        self.trace.write({"agent": "code_index", "event": "refresh", **index.stats})
+        return blast
+
+    def _related_context(self, git: GitTools, changed_files: List[str], diff_text: str) -> List[Snippet]:
+        index = RetrievalIndex(git)
+        try:
+            index.refresh()
+            started = time.perf_counter()
+            snippets = index.related_snippets(
+                diff_text,
+                changed_files,
+                k=self.cfg.related_context_k,
+                token_budget=self.cfg.related_context_tokens,
+            )
+        except (subprocess.CalledProcessError, OSError) as e:
+            self.trace.write({"agent": "retrieval", "event": "error", "error": str(e)})
+            return []
+        finally:
+            index.close()
+        query_ms = round((time.perf_counter() - started) * 1000, 2)
+        self.trace.write({"agent": "retrieval", "event": "query", **index.stats, "snippets": len(snippets), "query_ms": query_ms})
+        return snippets
+
+    def _hotspots(self, git: GitTools, changed_files: List[str]) -> Optional[HotspotReport]:
+        try:
+            index = HistoryIndex(git, max_commits=self.cfg.history_max_commits).refresh()
+        except (subprocess.CalledProcessError, OSError) as e:
+            self.trace.write({"agent": "history", "event": "error", "error": str(e)})
+            return None
+        self.trace.write({"agent": "history", "event": "refresh", **index.stats})
+        return index.hotspots(changed_files)
+
+    def _minimize_diff(self, git: GitTools, diff_text: str) -> str:
+        minimized = DiffMinimizer(git, context_lines=self.cfg.diff_context_lines).minimize(diff_text)
+        self.trace.write({"agent": "diff_minimizer", "event": "stats", **minimized.stats.as_dict()})
+        return minimized.text
+
+    def _build_evidence(
+        self,
+        changed_files: List[str],
+        diff_text: str,
+        user_ctx: UserContext,
+        blast: Optional[BlastRadius] = None,
+        related: Optional[List[Snippet]] = None,
+        hotspots: Optional[HotspotReport] = None,
+    ) -> List[Evidence]:
         evidence: List[Evidence] = []
         if changed_files:
             evidence.append(Evidence(type="changed_files", value="; ".join(changed_files[:50]), note="up to 50 files"))
         if diff_text:
-            snippet = diff_text[: self.cfg.max_llm_chars]
-            evidence.append(Evidence(type="diff_snippet", value=snippet, note=f"first {len(snippet)} chars"))
+            evidence.extend(self._diff_evidence(diff_text))
+        if blast and not blast.is_empty():
+            value = blast.to_evidence_value()[: self.cfg.max_llm_chars // 4]
+            evidence.append(Evidence(type="code_index", value=value, note="changed symbols, importers and callers"))
+        evidence.extend(s.to_evidence(self.redactor) for s in related or [])
+        if hotspots and not hotspots.is_empty():
+            evidence.append(Evidence(type="history", value=hotspots.to_evidence_value(), note="git history hotspots (churn, authors, fixes, reverts, co-change)"))
         if user_ctx.title or user_ctx.summary or user_ctx.environment or user_ctx.service_hints or user_ctx.links:
             evidence.append(Evidence(type="user_context", value=user_ctx.model_dump_json(ensure_ascii=False)))
-        return evidence
+        return assign_evidence_ids(evidence)
+
+    def _diff_evidence(self, diff_text: str) -> List[Evidence]:
+        """One diff_snippet per file (so citations stay specific), capped at max_llm_chars overall."""
+        sections: List[List[str]] = []
+        for line in diff_text.splitlines():
+            if line.startswith(("== ", "diff --git ")) or not sections:
+                sections.append([])
+            sections[-1].append(line)
+        out: List[Evidence] = []
+        budget = self.cfg.max_llm_chars
+        for lines in sections:
+            if budget <= 0:
+                break
+            text = "\n".join(lines)
+            snippet = text[:budget]
+            budget -= len(snippet) + 1
+            note = lines[0].removeprefix("== ").removeprefix("diff --git ")
+            if len(snippet) < len(text):
+                note += f" (first {len(snippet)} chars)"
+            out.append(Evidence(type="diff_snippet", value=snippet, note=note))
+        return out
+
+    @staticmethod
+    def _with_feedback(evidence: List[Evidence], review_feedback: dict | None) -> List[Evidence]:
+        if not review_feedback:
+            return evidence
+        return assign_evidence_ids(list(evidence) + [Evidence(type="review_feedback", value=str(review_feedback), note="Reviewer notes")])
 
     def _call_impact(self, evidence: List[Evidence], user_ctx: UserContext, review_feedback: dict | None = None) -> ImpactAnalysis:
-        if review_feedback:
-            evidence = list(evidence) + [Evidence(type="review_feedback", value=str(review_feedback), note="Reviewer notes")]
-        self.trace.write({"agent": "impact", "event": "call"})
-        out = self.impact_agent.run(evidence=evidence, user_ctx=user_ctx)
-        self.trace.write({"agent": "impact", "event": "result", "response": out.model_dump_json(ensure_ascii=False)})
+        evidence = self._with_feedback(evidence, review_feedback)
+        out = self._run_agent(self.impact_agent, evidence=evidence, user_ctx=user_ctx)
+        out.evidence = self._resolve_citations(evidence, out.citations, [out.summary, *out.scope, *out.assumptions])
         return out
 
     def _call_risk(self, evidence: List[Evidence], impact_json: str, user_ctx: UserContext, review_feedback: dict | None = None) -> RiskAssessment:
-        if review_feedback:
-            evidence = list(evidence) + [Evidence(type="review_feedback", value=str(review_feedback), note="Reviewer notes")]
-        self.trace.write({"agent": "risk", "event": "call"})
-        out = self.risk_agent.run(evidence=evidence, impact_json=impact_json, user_ctx=user_ctx)
-        self.trace.write({"agent": "risk", "event": "result", "response": out.model_dump_json(ensure_ascii=False)})
+        evidence = self._with_feedback(evidence, review_feedback)
+        out = self._run_agent(self.risk_agent, evidence=evidence, impact_json=impact_json, user_ctx=user_ctx)
+        if self.risk_floor:
+            self._apply_risk_floor(out, evidence)
+        out.evidence = self._resolve_citations(evidence, out.citations, [*out.reasons, *out.mitigations, *out.rollback])
         return out
 
+    def _apply_risk_floor(self, risk: RiskAssessment, evidence: List[Evidence]) -> None:
+        """Raise risk_level to the history floor; the LLM's level is kept when it is already higher."""
+        assert self.risk_floor is not None
+        floor, reason = self.risk_floor
+        if RISK_RANK[floor] <= RISK_RANK.get(risk.risk_level.strip().upper(), -1):
+            return
+        cite = next((f" [{e.id}]" for e in evidence if e.type == "history"), "")
+        self.trace.write({"agent": "history", "event": "risk_floor", "from": risk.risk_level, "to": floor, "reason": reason})
+        risk.risk_level = floor
+        risk.reasons.insert(0, f"Risk floor {floor} from change history: {reason}{cite}")
+
     def _call_review(self, evidence: List[Evidence], impact_json: str, risk_json: str, user_ctx: UserContext):
-        self.trace.write({"agent": "review", "event": "call"})
-        out = self.reviewer_agent.run(evidence=evidence, impact_json=impact_json, risk_json=risk_json, user_ctx=user_ctx)
-        self.trace.write({"agent": "review", "event": "result", "response": out.model_dump_json(ensure_ascii=False)})
+        return self._run_agent(self.reviewer_agent, evidence=evidence, impact_json=impact_json, risk_json=risk_json, user_ctx=user_ctx)
+
+    def _run_agent(self, agent: Agent[T], **kwargs: Any) -> T:
+        self.trace.write({"agent": agent.name, "event": "call"})
+        started = time.perf_counter()
+        try:
+            out = agent.run(**kwargs)
+        except ValueError as e:  # JSONDecodeError / pydantic ValidationError from parse()
+            latency = round(time.perf_counter() - started, 3)
+            usage = self._usage(agent)
+            self._record(agent, usage, latency)
+            self.trace.write({"agent": agent.name, "event": "parse_error", "error": str(e)[:500], "latency_s": latency, **usage})
+            raise
+        latency = round(time.perf_counter() - started, 3)
+        usage = self._usage(agent)
+        self._record(agent, usage, latency)
+        self.trace.write({"agent": agent.name, "event": "result", "response": out.model_dump_json(ensure_ascii=False), "latency_s": latency, **usage})
         return out
 
-    def _make_test_plan(self, repo_path: Path) -> TestPlan:
-        cmds: List[str] = []
-        if (repo_path / "pyproject.toml").exists() or (repo_path / "requirements.txt").exists():
-            cmds.append("pytest -q")
-        if (repo_path / "package.json").exists():
-            cmds.append("npm test")
-        if (repo_path / "pom.xml").exists():
-            cmds.append("mvn test")
-        if (repo_path / "gradlew").exists():
-            cmds.append("./gradlew test")
+    def _record(self, agent: Agent, usage: Dict[str, Any], latency: float) -> None:
+        if self.budget is not None:
+            self.budget.record(agent.name, usage, latency)
+
+    def _estimate(self, agent: Agent, **kwargs: Any) -> CallEstimate:
+        assert self.budget is not None
+        return self.budget.estimate(agent.name, agent.prompt_chars(**kwargs))
+
+    def _decide(self, decision: BudgetDecision) -> BudgetDecision:
+        assert self.budget is not None
+        remaining_s = self.budget.remaining_seconds()
+        self.trace.write({
+            "agent": "budget",
+            "event": "decision",
+            **decision.model_dump(),
+            "tokens_used": self.budget.tokens_used,
+            "remaining_tokens": self.budget.remaining_tokens(),
+            "remaining_s": None if remaining_s is None else round(remaining_s, 3),
+        })
+        return decision
+
+    @staticmethod
+    def _resolve_citations(evidence: List[Evidence], citations: List[str], texts: List[str]) -> List[Evidence]:
+        by_id = {e.id: e for e in evidence}
+        return [by_id[c] for c in cited_ids([*citations, *texts]) if c in by_id]
+
+    def _usage(self, agent: Agent) -> Dict[str, Any]:
+        """Prompt/completion size of the agent's last call (plus provider usage if reported)."""
+        usage: Dict[str, Any] = {
+            "prompt_chars": agent.last_prompt_chars,
+            "completion_chars": agent.last_completion_chars,
+            "prompt_tokens_est": chars_to_tokens(agent.last_prompt_chars),
+            "completion_tokens_est": chars_to_tokens(agent.last_completion_chars),
+            "cached": agent.last_cached,
+        }
+        reported = getattr(self.llm, "last_usage", None)
+        if reported and not agent.last_cached:
+            usage["usage"] = reported
+        return usage
+
+    def _start_tests(self, repo_path: Path, commands: List[str]) -> PendingTests:
+        runner = TestRunner(
+            repo_path,
+            max_workers=self.cfg.test_max_workers,
+            timeout_s=self.cfg.test_timeout_s,
+            max_output_bytes=self.cfg.test_output_max_bytes,
+        )
+        self.trace.write({"agent": "test_runner", "event": "start", "commands": commands})
+        return runner.start(commands)
+
+    def _collect_tests(self, pending: PendingTests) -> List[TestRunResult]:
+        results = pending.results()
+        for r in results:
+            self.trace.write({"agent": "test_runner", "event": "result", "command": r.command, "status": r.status, "duration_s": round(r.duration_s, 3)})
+        return results
+
+    def _test_evidence(self, results: List[TestRunResult], test_plan: TestPlan) -> List[Evidence]:
+        if results:
+            test_plan.evidence_available = [r.summary() for r in results]
+            failing = [r.command for r in results if r.status in ("FAIL", "TIMEOUT")]
+            test_plan.missing_evidence = (
+                [f"TODO: investigate failing/timed-out command `{c}`" for c in failing]
+                or ["TODO: attach CI link for the full pipeline run"]
+            )
+        return [r.to_evidence(self.redactor) for r in results]
+
+    def _make_test_plan(self, git: GitTools, changed_files: List[str]) -> Tuple[TestPlan, Dict[str, str]]:
+        """The plan plus the project root each command tests."""
+        roots: Dict[str, str] = {}
+        try:
+            roots = ProjectDetector(git).detect().test_targets(changed_files)
+            cmds = list(roots)
+        except (subprocess.CalledProcessError, OSError) as e:
+            self.trace.write({"agent": "test_plan", "event": "error", "error": str(e)})
+            cmds = []
         if not cmds:
             cmds = ["TODO: add project-specific test command"]
-        return TestPlan(
+        plan = TestPlan(
             recommended_commands=cmds,
-            evidence_available=["UNKNOWN (MVP does not execute CI/tests)"],
+            evidence_available=["UNKNOWN (tests not executed; enable with --run-tests)"],
             missing_evidence=["TODO: attach CI link or paste test output"],
         )
+        return plan, roots
+
+    def _repo_state(self, git: GitTools) -> Optional[Dict[str, str]]:
+        """Index blob SHA per tracked path, with the worktree SHA appended for unstaged edits."""
+        try:
+            state = git.ls_files_blobs()
+            for p, sha in git.worktree_blobs().items():
+                if p in state:
+                    state[p] += f":{sha or 'deleted'}"
+        except (subprocess.CalledProcessError, OSError) as e:
+            self.trace.write({"agent": "pipeline", "event": "error", "error": str(e)})
+            return None
+        return state
+
+    def _stage(self, name: str, key: Optional[str], compute: Callable[[], T]) -> T:
+        hit = self._cached(name, key)
+        if hit is not None:
+            return hit
+        value = compute()
+        return self._remember(name, key, value) if value is not None else value
+
+    def _cached(self, name: str, key: Optional[str]) -> Any:
+        if self.stage_cache is None or key is None:
+            return None
+        hit = self.stage_cache.get(name)
+        if hit is None or hit[0] != key:
+            return None
+        self.trace.write({"agent": name, "event": "cached", "fingerprint": key[:12]})
+        return hit[1]
+
+    def _remember(self, name: str, key: Optional[str], value: T) -> T:
+        if self.stage_cache is not None and key is not None:
+            self.stage_cache[name] = (key, value)
+        return value
+
+
+def _fingerprint(*parts: Any) -> str:
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, separators=(",", ":")).encode("utf-8")).hexdigest()
@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import hashlib
+from pathlib import Path
+from typing import Optional
+
+from agentic_changescribe.core.models import ChangePackResult, UserContext
+from agentic_changescribe.orchestration.pipeline import ChangePackPipeline
+from agentic_changescribe.tools.git_tools import GitTools
+from agentic_changescribe.tools.redaction import Redactor
+
+
+class WatchSession:
+    """Keeps one change pack up to date for a long-running `watch` process.
+
+    The pipeline, LLM client and redactor stay warm between refreshes. A
+    refresh is skipped when the diff fingerprint is unchanged. Inside a
+    refresh, the code index, history and each test command are reused when
+    their own inputs are unchanged; agent prompts embed the whole diff, so
+    only byte-identical prompts are answered from the agents' memo.
+    """
+
+    def __init__(
+        self,
+        pipeline: ChangePackPipeline,
+        git: GitTools,
+        redactor: Redactor,
+        mode: str,
+        user_ctx: UserContext,
+        out_dir: Path,
+    ) -> None:
+        self.pipeline = pipeline
+        self.git = git
+        self.redactor = redactor
+        self.mode = mode
+        self.user_ctx = user_ctx
+        self.out_dir = out_dir
+        self.fingerprint: Optional[str] = None
+        pipeline.enable_memo()
+
+    def refresh(self) -> Optional[ChangePackResult]:
+        changed_files = self.git.changed_files(mode=self.mode)
+        diff_text = self.redactor.redact_text(self.git.diff_text(mode=self.mode))
+        h = hashlib.sha256()
+        h.update("\0".join(changed_files).encode("utf-8"))
+        h.update(b"\0\0")
+        h.update(diff_text.encode("utf-8"))
+        fingerprint = h.hexdigest()
+        if fingerprint == self.fingerprint:
+            return None
+        result = self.pipeline.run(
+            repo_path=self.git.repo_path,
+            changed_files=changed_files,
+            diff_text=diff_text,
+            user_ctx=self.user_ctx,
+            out_dir=self.out_dir,
+        )
+        self.fingerprint = fingerprint
+        self.pipeline.trace.write({"agent": "watch", "event": "refresh", "fingerprint": fingerprint[:12]})
+        return result
@@ -0,0 +1,500 @@
+from __future__ import annotations
+
+import ast
+import json
+import posixpath
+import re
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from agentic_changescribe.tools.git_tools import GitTools
+
+INDEX_VERSION = 2
+MAX_FILE_BYTES = 512_000
+PARALLEL_THRESHOLD = 256
+
+BULK_REINDEX_ROWS = 2_000
+
+_TABLES = """
+CREATE TABLE blobs (sha TEXT PRIMARY KEY, rec TEXT NOT NULL);
+CREATE TABLE files (id INTEGER PRIMARY KEY, path TEXT NOT NULL UNIQUE, sha TEXT NOT NULL);
+CREATE TABLE imports (key TEXT NOT NULL, file INTEGER NOT NULL, PRIMARY KEY (key, file)) WITHOUT ROWID;
+CREATE TABLE refs (name TEXT NOT NULL, file INTEGER NOT NULL, PRIMARY KEY (name, file)) WITHOUT ROWID;
+CREATE INDEX files_sha ON files (sha);
+"""
+# Dropped and rebuilt around large (cold) writes, which beats maintaining them row by row.
+_ROW_INDEXES = {"imports_file": "imports (file)", "refs_file": "refs (file)"}
+
+_LANG_BY_EXT = {
+    ".py": "python",
+    ".js": "js", ".jsx": "js", ".mjs": "js", ".cjs": "js", ".ts": "js", ".tsx": "js",
+    ".go": "go",
+    ".java": "java", ".kt": "java", ".kts": "java", ".scala": "java",
+    ".rs": "rust",
+    ".rb": "ruby",
+}
+
+
+def _defs(*pairs: Tuple[str, str]) -> List[Tuple[str, "re.Pattern[str]"]]:
+    return [(kind, re.compile(rx, re.M)) for kind, rx in pairs]
+
+
+_DEF_PATTERNS = {
+    "js": _defs(
+        ("function", r"^\s*(?:export\s+)?(?:default\s+)?(?:async\s+)?function\s*\*?\s*([A-Za-z_$][\w$]*)"),
+        ("class", r"^\s*(?:export\s+)?(?:default\s+)?(?:abstract\s+)?class\s+([A-Za-z_$][\w$]*)"),
+        ("function", r"^\s*(?:export\s+)?(?:const|let|var)\s+([A-Za-z_$][\w$]*)\s*=\s*(?:async\s+)?(?:function|\([^)]*\)\s*=>|[A-Za-z_$][\w$]*\s*=>)"),
+        ("type", r"^\s*(?:export\s+)?(?:interface|type|enum)\s+([A-Za-z_$][\w$]*)"),
+    ),
+    "go": _defs(
+        ("function", r"^func\s+(?:\([^)]*\)\s*)?([A-Za-z_]\w*)"),
+        ("type", r"^type\s+([A-Za-z_]\w*)"),
+    ),
+    "java": _defs(
+        ("class", r"^\s*(?:[\w@]+\s+)*(?:class|interface|enum|record|object)\s+([A-Za-z_]\w*)"),
+        ("function", r"^\s*(?:(?:public|private|protected|internal|static|final|abstract|synchronized|override|suspend)\s+)*fun\s+(?:<[^>]*>\s*)?(?:[\w.]+\.)?([A-Za-z_]\w*)"),
+        ("function", r"^\s*(?:(?:public|private|protected|static|final|abstract|synchronized|native|default)\s+)+[\w<>\[\],.? \t]+?[ \t]+([A-Za-z_]\w*)[ \t]*\("),
+    ),
+    "rust": _defs(
+        ("function", r"^\s*(?:pub(?:\([^)]*\))?\s+)?(?:async\s+)?(?:unsafe\s+)?fn\s+([A-Za-z_]\w*)"),
+        ("type", r"^\s*(?:pub(?:\([^)]*\))?\s+)?(?:struct|enum|trait|mod)\s+([A-Za-z_]\w*)"),
+    ),
+    "ruby": _defs(
+        ("function", r"^\s*def\s+(?:self\.)?([A-Za-z_]\w*[?!=]?)"),
+        ("class", r"^\s*(?:class|module)\s+([A-Z]\w*)"),
+    ),
+}
+
+_IMPORT_PATTERNS = {
+    "js": [
+        re.compile(r"""(?:import|export)\s[^'";]*?from\s*['"]([^'"]+)['"]"""),
+        re.compile(r"""(?:^|[^\w.])import\s*\(?\s*['"]([^'"]+)['"]"""),
+        re.compile(r"""require\(\s*['"]([^'"]+)['"]\s*\)"""),
+    ],
+    "go": [re.compile(r'^\s*(?:import\s+)?(?:[\w.]+\s+)?"([^"]+)"\s*$', re.M)],
+    "java": [re.compile(r"^\s*import\s+(?:static\s+)?([\w.]+)", re.M)],
+    "rust": [re.compile(r"^\s*(?:pub\s+)?use\s+([\w:]+)", re.M)],
+    "ruby": [re.compile(r"""^\s*require(?:_relative)?\s*\(?\s*['"]([^'"]+)['"]""", re.M)],
+}
+
+_PACKAGE_STEMS = {"python": "/__init__", "js": "/index", "rust": "/mod"}
+_CALL_RE = re.compile(r"\b([A-Za-z_$][\w$]*)\s*\(")
+_HUNK_RE = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+_KEYWORDS = {
+    "if", "for", "while", "switch", "catch", "return", "function", "typeof", "new", "super",
+    "match", "fn", "func", "def", "print", "println", "sizeof", "elif", "and", "or", "not",
+}
+
+
+@dataclass
+class Symbol:
+    name: str
+    kind: str
+    start: int
+    end: int
+
+
+@dataclass
+class BlastRadius:
+    """Changed symbols per file plus reverse dependents (importers/callers)."""
+
+    changed_symbols: Dict[str, List[Symbol]] = field(default_factory=dict)
+    importers: Dict[str, List[str]] = field(default_factory=dict)
+    callers: Dict[str, List[str]] = field(default_factory=dict)
+
+    def is_empty(self) -> bool:
+        return not (self.changed_symbols or self.importers or self.callers)
+
+    def to_evidence_value(self, max_items: int = 8) -> str:
+        lines: List[str] = []
+        for path in sorted(set(self.changed_symbols) | set(self.importers)):
+            syms = self.changed_symbols.get(path, [])
+            sym_txt = ", ".join(f"{s.name} ({s.kind} L{s.start}-{s.end})" for s in syms[:max_items]) or "module-level"
+            if len(syms) > max_items:
+                sym_txt += f", +{len(syms) - max_items} more"
+            lines.append(f"{path}: changed {sym_txt}")
+            imp = self.importers.get(path, [])
+            if imp:
+                lines.append(f"  imported by: {_capped(imp, max_items)}")
+        for name in sorted(self.callers):
+            lines.append(f"callers of {name}: {_capped(self.callers[name], max_items)}")
+        return "\n".join(lines)
+
+
+def _capped(items: List[str], n: int) -> str:
+    txt = ", ".join(items[:n])
+    return txt + (f", +{len(items) - n} more" if len(items) > n else "")
+
+
+def language_for(path: str) -> Optional[str]:
+    return _LANG_BY_EXT.get(posixpath.splitext(path)[1].lower())
+
+
+def parse_source(lang: str, text: str) -> Dict[str, Any]:
+    """Extract symbols, raw import strings and called names from one file."""
+    if lang == "python":
+        try:
+            return _parse_python(text)
+        except (SyntaxError, ValueError, RecursionError, MemoryError):  # deeply nested or huge sources
+            pass
+    return _parse_lexical(lang, text)
+
+
+def _parse_python(text: str) -> Dict[str, Any]:
+    # Only statement bodies are walked; call sites come from the cheap lexical
+    # scan, which keeps a cold index of a large repo in the seconds range.
+    tree = ast.parse(text)
+    symbols: List[List[Any]] = []
+    imports: Set[str] = set()
+    refs: Set[str] = {m.group(1) for m in _CALL_RE.finditer(text)} - _KEYWORDS
+
+    def visit(stmts: List[ast.stmt], prefix: str) -> None:
+        for node in stmts:
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                kind = "class" if isinstance(node, ast.ClassDef) else "function"
+                qual = f"{prefix}{node.name}"
+                start = min([node.lineno] + [d.lineno for d in node.decorator_list])
+                symbols.append([qual, kind, start, node.end_lineno or node.lineno])
+                visit(node.body, qual + ".")
+            elif isinstance(node, ast.Import):
+                imports.update(a.name for a in node.names)
+            elif isinstance(node, ast.ImportFrom):
+                base = "." * node.level + (node.module or "")
+                imports.add(base)
+                sep = "" if base.endswith(".") else "."
+                for a in node.names:
+                    if a.name != "*":
+                        imports.add(f"{base}{sep}{a.name}")
+                        refs.add(a.name)
+            else:
+                for attr in ("body", "orelse", "finalbody"):
+                    visit(getattr(node, attr, None) or [], prefix)
+                for sub in getattr(node, "handlers", None) or getattr(node, "cases", None) or []:
+                    visit(sub.body, prefix)
+
+    visit(tree.body, "")
+    return {"symbols": symbols, "imports": sorted(imports), "refs": sorted(refs)}
+
+
+def _parse_lexical(lang: str, text: str) -> Dict[str, Any]:
+    starts: List[Tuple[int, str, str]] = []
+    line_offsets = _line_offsets(text)
+    for kind, pat in _DEF_PATTERNS.get(lang, []):
+        for m in pat.finditer(text):
+            starts.append((_line_of(line_offsets, m.start(1)), m.group(1), kind))
+    starts = sorted({s[0]: s for s in starts}.values())
+    total = len(line_offsets) - (1 if text.endswith("\n") else 0)
+    symbols = [
+        [name, kind, line, (starts[i + 1][0] - 1) if i + 1 < len(starts) else total]
+        for i, (line, name, kind) in enumerate(starts)
+    ]
+    imports: Set[str] = set()
+    for pat in _IMPORT_PATTERNS.get(lang, []):
+        imports.update(m.group(1) for m in pat.finditer(text))
+    refs = {m.group(1) for m in _CALL_RE.finditer(text)} - _KEYWORDS
+    return {"symbols": symbols, "imports": sorted(imports), "refs": sorted(refs)}
+
+
+def _line_offsets(text: str) -> List[int]:
+    offsets = [0]
+    for m in re.finditer("\n", text):
+        offsets.append(m.end())
+    return offsets
+
+
+def _line_of(offsets: List[int], pos: int) -> int:
+    lo, hi = 0, len(offsets)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if offsets[mid] <= pos:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+
+def _parse_file(args: Tuple[str, str]) -> Optional[Dict[str, Any]]:
+    path, lang = args
+    try:
+        p = Path(path)
+        if p.stat().st_size > MAX_FILE_BYTES:
+            return {"symbols": [], "imports": [], "refs": []}
+        return parse_source(lang, p.read_text(encoding="utf-8-sig", errors="replace"))
+    except OSError:
+        return None
+
+
+def changed_line_ranges(diff_text: str) -> Dict[str, List[Tuple[int, int]]]:
+    """New-side line ranges actually added/removed by each file in a unified diff."""
+    lines_by_file: Dict[str, List[int]] = {}
+    current: Optional[str] = None
+    new_line = old_left = new_left = 0
+    for line in diff_text.splitlines():
+        if old_left > 0 or new_left > 0:
+            tag = line[:1]
+            if tag == "+":
+                if current:
+                    lines_by_file.setdefault(current, []).append(new_line)
+                new_line += 1
+                new_left -= 1
+            elif tag == "-":
+                if current:
+                    lines_by_file.setdefault(current, []).append(max(new_line, 1))
+                old_left -= 1
+            elif tag != "\\":
+                new_line += 1
+                old_left -= 1
+                new_left -= 1
+            continue
+        if line.startswith("+++ "):
+            target = line[4:].strip()
+            current = None if target == "/dev/null" else target[2:] if target.startswith("b/") else target
+        elif line.startswith("@@"):
+            m = _HUNK_RE.match(line)
+            if m:
+                old_left = int(m.group(2)) if m.group(2) is not None else 1
+                new_line = int(m.group(3))
+                new_left = int(m.group(4)) if m.group(4) is not None else 1
+    ranges: Dict[str, List[Tuple[int, int]]] = {}
+    for path, nums in lines_by_file.items():
+        merged: List[Tuple[int, int]] = []
+        for n in sorted(set(nums)):
+            if merged and n <= merged[-1][1] + 1:
+                merged[-1] = (merged[-1][0], n)
+            else:
+                merged.append((n, n))
+        ranges[path] = merged
+    return ranges
+
+
+def _module_key(path: str, lang: str) -> str:
+    stem, _ = posixpath.splitext(path)
+    if lang == "go":
+        return posixpath.dirname(path)
+    tail = _PACKAGE_STEMS.get(lang)
+    if tail and (stem == tail[1:] or stem.endswith(tail)):
+        return stem[: -len(tail)]
+    return stem
+
+
+def _import_key(raw: str, importer: str, lang: str) -> str:
+    base_dir = posixpath.dirname(importer)
+    if lang == "python":
+        stripped = raw.lstrip(".")
+        level = len(raw) - len(stripped)
+        if level:
+            for _ in range(level - 1):
+                base_dir = posixpath.dirname(base_dir)
+            return posixpath.normpath(posixpath.join(base_dir, stripped.replace(".", "/")))
+        return stripped.replace(".", "/")
+    if lang in ("js", "ruby") and raw.startswith("."):
+        key = posixpath.normpath(posixpath.join(base_dir, raw))
+        return _module_key(key + ("" if posixpath.splitext(key)[1] else ".x"), lang)
+    if lang == "java":
+        return raw.replace(".", "/")
+    if lang == "rust":
+        return raw.replace("::", "/").removeprefix("crate/")
+    return raw
+
+
+def _import_keys(rec: Dict[str, Any], path: str) -> Set[str]:
+    """Resolved module keys a file imports (Go imports also match by path suffix)."""
+    lang = language_for(path) or ""
+    keys: Set[str] = set()
+    for raw in rec["imports"]:
+        key = _import_key(raw, path, lang)
+        keys.update(_suffixes(key) if lang == "go" else (key,))
+    return keys
+
+
+def _create_row_indexes(db: sqlite3.Connection) -> None:
+    for name, target in _ROW_INDEXES.items():
+        db.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {target}")
+
+
+def _select_in(db: sqlite3.Connection, sql: str, values: List[str], chunk: int = 500) -> Iterator[Tuple[Any, ...]]:
+    for i in range(0, len(values), chunk):
+        part = values[i : i + chunk]
+        yield from db.execute(sql.format(",".join("?" * len(part))), part)
+
+
+def _suffixes(key: str) -> Iterable[str]:
+    parts = key.split("/")
+    yield key
+    for i in range(1, len(parts) - 1):
+        yield "/".join(parts[i:])
+
+
+class CodeIndex:
+    """Incremental symbol/import index persisted under the repo's git dir.
+
+    Parsed records are cached by blob SHA in SQLite, next to per-path import
+    keys and call names, so a refresh only touches rows for paths whose index
+    blob changed and blast-radius queries read just the matching rows. Files
+    with unstaged edits are parsed into memory and never persisted.
+    """
+
+    def __init__(self, git: GitTools, cache_path: Optional[Path] = None) -> None:
+        self.git = git
+        self.cache_path = cache_path or git.git_path("agentic-scribe/code-index.sqlite")
+        self.db: Optional[sqlite3.Connection] = None
+        self.worktree: Dict[str, Optional[Dict[str, Any]]] = {}
+        self.stats: Dict[str, int] = {"files": 0, "parsed": 0, "updated": 0}
+
+    def refresh(self) -> "CodeIndex":
+        index = {p: sha for p, sha in self.git.ls_files_blobs().items() if language_for(p)}
+        # Files are parsed from the worktree, so unstaged edits are keyed by their worktree SHA.
+        dirty = {p: sha for p, sha in self.git.worktree_blobs().items() if p in index}
+        db = self._connect()
+        stored = {path: (fid, sha) for fid, path, sha in db.execute("SELECT id, path, sha FROM files")}
+        stale = {p: sha for p, sha in index.items() if p not in dirty and stored.get(p, (0, None))[1] != sha}
+        removed = [p for p in stored if p not in index]
+
+        wanted = {sha: p for p, sha in stale.items()}
+        wanted.update((sha, p) for p, sha in dirty.items() if sha)
+        known = {sha: json.loads(rec) for sha, rec in _select_in(db, "SELECT sha, rec FROM blobs WHERE sha IN ({})", list(wanted))}
+        todo = [(sha, p) for sha, p in wanted.items() if sha not in known]
+        args = [(str(self.git.repo_path / p), language_for(p) or "") for _, p in todo]
+        if len(args) >= PARALLEL_THRESHOLD:
+            with ProcessPoolExecutor() as pool:
+                results = list(pool.map(_parse_file, args, chunksize=64))
+        else:
+            results = [_parse_file(a) for a in args]
+        parsed = {sha: rec for (sha, _), rec in zip(todo, results) if rec is not None}
+
+        self.worktree = {p: (known.get(sha) or parsed.get(sha)) if sha else None for p, sha in dirty.items()}
+        if stale or removed:
+            self._write(stale, removed, stored, {**known, **parsed})
+        self.stats = {"files": len(index) - sum(1 for r in self.worktree.values() if r is None), "parsed": len(todo), "updated": len(stale) + len(removed)}
+        return self
+
+    def close(self) -> None:
+        if self.db is not None:
+            self.db.close()
+            self.db = None
+
+    def record(self, path: str) -> Optional[Dict[str, Any]]:
+        if path in self.worktree:
+            return self.worktree[path]
+        if self.db is None:
+            return None
+        row = self.db.execute("SELECT b.rec FROM files f JOIN blobs b ON b.sha = f.sha WHERE f.path = ?", (path,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def enclosing_symbols(self, path: str, ranges: List[Tuple[int, int]]) -> List[Symbol]:
+        """Innermost symbols overlapping any of the given line ranges."""
+        rec = self.record(path)
+        if not rec:
+            return []
+        found: Dict[str, Symbol] = {}
+        for lo, hi in ranges:
+            hits = [s for s in rec["symbols"] if s[2] <= hi and s[3] >= lo]
+            for sym in hits:
+                nested = any(o is not sym and sym[2] <= o[2] and o[3] <= sym[3] for o in hits)
+                if not nested:
+                    found.setdefault(sym[0], Symbol(name=sym[0], kind=sym[1], start=sym[2], end=sym[3]))
+        return sorted(found.values(), key=lambda s: s.start)
+
+    def blast_radius(self, changed_files: List[str], diff_text: str, max_dependents: int = 25) -> BlastRadius:
+        result = BlastRadius()
+        ranges = changed_line_ranges(diff_text)
+        targets: Dict[str, str] = {}
+        for path in changed_files:
+            lang = language_for(path)
+            if not lang:
+                continue
+            syms = self.enclosing_symbols(path, ranges.get(path, []))
+            if syms:
+                result.changed_symbols[path] = syms
+            for suffix in _suffixes(_module_key(path, lang)):
+                targets.setdefault(suffix, path)
+
+        names: Dict[str, Set[str]] = {}
+        for path, syms in result.changed_symbols.items():
+            for s in syms:
+                short = s.name.rsplit(".", 1)[-1]
+                if len(short) >= 3 and not short.startswith("__"):
+                    names.setdefault(short, set()).add(path)
+
+        # Persisted rows, minus paths the caller changed or the worktree overrides.
+        changed = set(changed_files)
+        skip = changed | set(self.worktree)
+        importers: Dict[str, Set[str]] = {}
+        callers: Dict[str, Set[str]] = {}
+        if self.db is not None:
+            for key, path in _select_in(self.db, "SELECT i.key, f.path FROM imports i JOIN files f ON f.id = i.file WHERE i.key IN ({})", list(targets)):
+                if path not in skip:
+                    importers.setdefault(targets[key], set()).add(path)
+            for name, path in _select_in(self.db, "SELECT r.name, f.path FROM refs r JOIN files f ON f.id = r.file WHERE r.name IN ({})", list(names)):
+                if path not in skip:
+                    callers.setdefault(name, set()).add(path)
+        for path, rec in self.worktree.items():
+            if rec is None or path in changed:
+                continue
+            for key in _import_keys(rec, path):
+                if key in targets:
+                    importers.setdefault(targets[key], set()).add(path)
+            for ref in names.keys() & set(rec["refs"]):
+                callers.setdefault(ref, set()).add(path)
+        result.importers = {k: sorted(v)[:max_dependents] for k, v in importers.items()}
+        result.callers = {k: sorted(v)[:max_dependents] for k, v in callers.items()}
+        return result
+
+    def _connect(self) -> sqlite3.Connection:
+        if self.db is not None:
+            return self.db
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        self.cache_path.with_name("code-index.json").unlink(missing_ok=True)  # pre-SQLite cache
+        db = sqlite3.connect(str(self.cache_path), timeout=10)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        if db.execute("PRAGMA user_version").fetchone()[0] != INDEX_VERSION:
+            with db:
+                for table in ("blobs", "files", "imports", "refs"):
+                    db.execute(f"DROP TABLE IF EXISTS {table}")
+                db.executescript(_TABLES)
+                _create_row_indexes(db)
+                db.execute(f"PRAGMA user_version={INDEX_VERSION}")
+        self.db = db
+        return db
+
+    def _write(self, stale: Dict[str, str], removed: List[str], stored: Dict[str, Tuple[int, str]], recs: Dict[str, Dict[str, Any]]) -> None:
+        """Replace the rows of changed/removed index paths in one transaction."""
+        db = self._connect()
+        touched = [(stored[p][0],) for p in (*stale, *removed) if p in stored]
+        next_id = max((fid for fid, _ in stored.values()), default=0) + 1
+        files: List[Tuple[int, str, str]] = []
+        imports: List[Tuple[str, int]] = []
+        refs: List[Tuple[str, int]] = []
+        for path, sha in stale.items():
+            rec = recs.get(sha)
+            if rec is None:
+                continue  # unreadable; retried on the next refresh
+            if path in stored:
+                fid = stored[path][0]
+            else:
+                fid, next_id = next_id, next_id + 1
+            files.append((fid, path, sha))
+            imports.extend((k, fid) for k in _import_keys(rec, path))
+            refs.extend((r, fid) for r in rec["refs"])
+        new_blobs = {sha for _, _, sha in files}
+        orphans = {stored[p][1] for p in (*stale, *removed) if p in stored} - new_blobs
+        bulk = len(refs) + len(touched) > BULK_REINDEX_ROWS
+        with db:
+            if bulk:
+                for name in _ROW_INDEXES:
+                    db.execute(f"DROP INDEX IF EXISTS {name}")
+            db.executemany("DELETE FROM imports WHERE file = ?", touched)
+            db.executemany("DELETE FROM refs WHERE file = ?", touched)
+            db.executemany("DELETE FROM files WHERE id = ?", touched)
+            db.executemany("INSERT OR IGNORE INTO blobs (sha, rec) VALUES (?, ?)", ((sha, json.dumps(recs[sha], separators=(",", ":"))) for sha in new_blobs))
+            db.executemany("INSERT INTO files (id, path, sha) VALUES (?, ?, ?)", files)
+            # Key order keeps the clustered (WITHOUT ROWID) inserts sequential.
+            db.executemany("INSERT INTO imports (key, file) VALUES (?, ?)", sorted(imports))
+            db.executemany("INSERT INTO refs (name, file) VALUES (?, ?)", sorted(refs))
+            db.executemany("DELETE FROM blobs WHERE sha = ? AND NOT EXISTS (SELECT 1 FROM files WHERE files.sha = blobs.sha)", ((sha,) for sha in orphans))
+            if bulk:
+                _create_row_indexes(db)
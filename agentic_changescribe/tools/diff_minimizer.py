@@ -0,0 +1,326 @@
+from __future__ import annotations
+
+import fnmatch
+import posixpath
+import re
+import subprocess
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from agentic_changescribe.tools.git_tools import GitTools
+
+_HUNK_RE = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@ ?(.*)$")
+
+_LOCKFILES = {
+    "package-lock.json", "npm-shrinkwrap.json", "yarn.lock", "pnpm-lock.yaml", "bun.lockb",
+    "poetry.lock", "Pipfile.lock", "uv.lock", "pdm.lock", "Cargo.lock", "go.sum",
+    "Gemfile.lock", "composer.lock", "Podfile.lock", "packages.lock.json", "gradle.lockfile",
+    "mix.lock", "pubspec.lock", "flake.lock",
+}
+_VENDORED_DIRS = ("vendor/", "node_modules/", "third_party/", "third-party/", "bower_components/", "Pods/")
+_GENERATED_GLOBS = (
+    "*.min.js", "*.min.css", "*.map", "*.pb.go", "*_pb2.py", "*_pb2_grpc.py", "*.pb.h", "*.pb.cc",
+    "*.generated.*", "*.g.dart", "*.designer.cs", "dist/*", "*/dist/*",
+)
+_GENERATED_RE = re.compile("|".join(fnmatch.translate(g) for g in _GENERATED_GLOBS))
+# Generator header conventions only (`@generated`, Go's "Code generated ... DO NOT EDIT.");
+# checked on line 1 and the leading comment block.
+_GENERATED_HEADER_RE = re.compile(r"@generated\b|^// Code generated .* DO NOT EDIT\.$")
+_COMMENT_PREFIXES = ("#", "//", "/*", "*", "--", ";", "<!--", "%")
+_INDENT_SENSITIVE_EXTS = (".py", ".pyi", ".yaml", ".yml", ".mk")
+_INDENT_SENSITIVE_NAMES = ("Makefile", "GNUmakefile", "makefile")
+_WS_RUN_RE = re.compile(r"\s+")
+_INDENT_RE = re.compile(r"^\s*")
+_MINIFIED_LINE_CHARS = 1000
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate (~4 chars/token) used for budget accounting."""
+    return chars_to_tokens(len(text))
+
+
+def chars_to_tokens(chars: int) -> int:
+    return (chars + 3) // 4
+
+
+@dataclass
+class _Hunk:
+    header: str
+    old_start: int
+    new_start: int
+    lines: List[str] = field(default_factory=list)
+
+
+@dataclass
+class _FileDiff:
+    path: str
+    status: str = ""
+    header: List[str] = field(default_factory=list)
+    hunks: List[_Hunk] = field(default_factory=list)
+    binary: bool = False
+
+    @property
+    def added(self) -> int:
+        return sum(1 for h in self.hunks for ln in h.lines if ln.startswith("+"))
+
+    @property
+    def deleted(self) -> int:
+        return sum(1 for h in self.hunks for ln in h.lines if ln.startswith("-"))
+
+
+@dataclass
+class DiffStats:
+    raw_chars: int = 0
+    minimized_chars: int = 0
+    summarized: Dict[str, str] = field(default_factory=dict)
+    whitespace_hunks_dropped: int = 0
+
+    @property
+    def raw_tokens(self) -> int:
+        return chars_to_tokens(self.raw_chars)
+
+    @property
+    def minimized_tokens(self) -> int:
+        return chars_to_tokens(self.minimized_chars)
+
+    def as_dict(self) -> Dict[str, object]:
+        saved = self.raw_tokens - self.minimized_tokens
+        return {
+            "raw_chars": self.raw_chars,
+            "minimized_chars": self.minimized_chars,
+            "raw_tokens_est": self.raw_tokens,
+            "minimized_tokens_est": self.minimized_tokens,
+            "tokens_saved_est": saved,
+            "saved_pct": round(100.0 * saved / self.raw_tokens, 1) if self.raw_tokens else 0.0,
+            "summarized_files": len(self.summarized),
+            "whitespace_hunks_dropped": self.whitespace_hunks_dropped,
+        }
+
+
+@dataclass
+class MinimizedDiff:
+    text: str
+    stats: DiffStats
+
+
+class DiffMinimizer:
+    """Shrinks a unified diff before it is packed into agent evidence.
+
+    Generated, vendored, binary and lockfile content is collapsed into a
+    numstat line; whitespace-only hunks are dropped and context is trimmed.
+    """
+
+    def __init__(self, git: Optional[GitTools] = None, context_lines: int = 1) -> None:
+        self.git = git
+        self.context_lines = context_lines
+
+    def minimize(self, diff_text: str) -> MinimizedDiff:
+        stats = DiffStats(raw_chars=len(diff_text))
+        files = parse_diff(diff_text)
+        attrs = self._attributes([f.path for f in files])
+
+        out: List[str] = []
+        for f in files:
+            reason = self._summarize_reason(f, attrs.get(f.path, {}))
+            head = f"== {f.path}" + (f" ({f.status})" if f.status else "")
+            if reason:
+                stats.summarized[f.path] = reason
+                counts = "" if reason == "binary" else f": +{f.added} -{f.deleted}"
+                out.append(f"{head} [{reason}{counts}, content omitted]")
+                continue
+            hunks: List[str] = []
+            keep_indent = _indent_sensitive(f.path)
+            for h in f.hunks:
+                for sub in _trim_context(h, self.context_lines):
+                    if _whitespace_only(sub, keep_indent):
+                        stats.whitespace_hunks_dropped += 1
+                        continue
+                    hunks.append(_format_hunk(sub))
+            if not hunks and f.hunks:
+                out.append(f"{head} [whitespace-only changes omitted]")
+                continue
+            out.append(head)
+            out.extend(hunks)
+
+        text = "\n".join(out) + ("\n" if out else "")
+        stats.minimized_chars = len(text)
+        return MinimizedDiff(text=text, stats=stats)
+
+    def _attributes(self, paths: List[str]) -> Dict[str, Dict[str, str]]:
+        if not self.git or not paths:
+            return {}
+        try:
+            return self.git.check_attr(paths, ["linguist-generated", "linguist-vendored", "binary"])
+        except (subprocess.CalledProcessError, OSError):
+            return {}
+
+    @staticmethod
+    def _summarize_reason(f: _FileDiff, attrs: Dict[str, str]) -> Optional[str]:
+        if f.binary or attrs.get("binary") == "set":
+            return "binary"
+        # An explicit unset/false only overrides the heuristics for its own category.
+        overridden = set()
+        for attr, reason in (("linguist-generated", "generated"), ("linguist-vendored", "vendored")):
+            value = attrs.get(attr, "unspecified")
+            if value in ("set", "true"):
+                return reason
+            if value in ("unset", "false"):
+                overridden.add(reason)
+        for reason in (path_reason(f.path), _content_reason(f)):
+            if reason and reason not in overridden:
+                return reason
+        return None
+
+
+def path_reason(path: str) -> Optional[str]:
+    """lockfile|vendored|generated when the path alone marks a file as noise."""
+    if posixpath.basename(path) in _LOCKFILES:
+        return "lockfile"
+    if any(path.startswith(d) or f"/{d}" in path for d in _VENDORED_DIRS):
+        return "vendored"
+    if _GENERATED_RE.match(path):
+        return "generated"
+    return None
+
+
+def _content_reason(f: _FileDiff) -> Optional[str]:
+    # Only the first hunk can show the file header, and only if it starts at line 1.
+    in_header = bool(f.hunks) and f.hunks[0].new_start <= 1
+    for h in f.hunks:
+        for ln in h.lines:
+            if ln.startswith(("-", "\\")):
+                continue
+            if len(ln) > _MINIFIED_LINE_CHARS:
+                return "minified"
+            if in_header:
+                text = ln[1:].strip()
+                if _GENERATED_HEADER_RE.search(text):
+                    return "generated"
+                # Line 1 (e.g. a shebang) is always checked; after that only the leading comment block.
+                in_header = not text or text.startswith(_COMMENT_PREFIXES)
+        in_header = False
+    return None
+
+
+def parse_diff(diff_text: str) -> List[_FileDiff]:
+    """Split `git diff` output into per-file headers and hunks."""
+    files: List[_FileDiff] = []
+    cur: Optional[_FileDiff] = None
+    hunk: Optional[_Hunk] = None
+    old_left = new_left = 0
+    for line in diff_text.splitlines():
+        if hunk is not None and (old_left > 0 or new_left > 0):
+            hunk.lines.append(line)
+            tag = line[:1]
+            if tag == "+":
+                new_left -= 1
+            elif tag == "-":
+                old_left -= 1
+            elif tag != "\\":
+                old_left -= 1
+                new_left -= 1
+            continue
+        if line.startswith("diff --git "):
+            cur = _FileDiff(path=_path_from_git_header(line))
+            files.append(cur)
+            hunk = None
+            continue
+        if cur is None:
+            continue
+        m = _HUNK_RE.match(line)
+        if m:
+            old_left = int(m.group(2)) if m.group(2) is not None else 1
+            new_left = int(m.group(4)) if m.group(4) is not None else 1
+            hunk = _Hunk(header=m.group(5), old_start=int(m.group(1)), new_start=int(m.group(3)))
+            cur.hunks.append(hunk)
+        elif line.startswith("\\") and hunk is not None:
+            hunk.lines.append(line)
+        else:
+            _apply_header_line(cur, line)
+    return files
+
+
+def _path_from_git_header(line: str) -> str:
+    rest = line[len("diff --git "):]
+    if " b/" in rest:
+        return rest.rsplit(" b/", 1)[1]
+    return rest.split(" ", 1)[-1]
+
+
+def _apply_header_line(f: _FileDiff, line: str) -> None:
+    f.header.append(line)
+    if line.startswith("+++ ") and line[4:].startswith("b/"):
+        f.path = line[6:]
+    elif line.startswith("new file mode"):
+        f.status = "new file"
+    elif line.startswith("deleted file mode"):
+        f.status = "deleted"
+    elif line.startswith("rename from "):
+        f.status = f"renamed from {line[len('rename from '):]}"
+    elif line.startswith("Binary files ") or line.startswith("GIT binary patch"):
+        f.binary = True
+
+
+def _trim_context(h: _Hunk, context: int) -> List[_Hunk]:
+    """Re-cut a hunk so at most `context` unchanged lines surround each change."""
+    numbered: List[Tuple[str, int, int]] = []
+    old_no, new_no = h.old_start, h.new_start
+    for ln in h.lines:
+        numbered.append((ln, old_no, new_no))
+        tag = ln[:1]
+        if tag == "+":
+            new_no += 1
+        elif tag == "-":
+            old_no += 1
+        elif tag != "\\":
+            old_no += 1
+            new_no += 1
+
+    changed = [i for i, (ln, _, _) in enumerate(numbered) if ln[:1] in "+-" and ln]
+    if not changed:
+        return []
+    groups: List[Tuple[int, int]] = []
+    for i in changed:
+        lo, hi = max(0, i - context), min(len(numbered) - 1, i + context)
+        if groups and lo <= groups[-1][1] + 1:
+            groups[-1] = (groups[-1][0], max(groups[-1][1], hi))
+        else:
+            groups.append((lo, hi))
+
+    out: List[_Hunk] = []
+    for lo, hi in groups:
+        while hi + 1 < len(numbered) and numbered[hi + 1][0].startswith("\\"):
+            hi += 1
+        _, old_start, new_start = numbered[lo]
+        out.append(_Hunk(header=h.header, old_start=old_start, new_start=new_start, lines=[n[0] for n in numbered[lo: hi + 1]]))
+    return out
+
+
+def _indent_sensitive(path: str) -> bool:
+    name = posixpath.basename(path)
+    return name in _INDENT_SENSITIVE_NAMES or name.endswith(_INDENT_SENSITIVE_EXTS)
+
+
+def _normalize_ws(line: str, keep_indent: bool) -> str:
+    """`git diff -b` semantics: runs of whitespace compare equal, trailing whitespace is ignored."""
+    indent = _INDENT_RE.match(line).group(0) if keep_indent else ""
+    return indent + _WS_RUN_RE.sub(" ", line[len(indent):]).rstrip()
+
+
+def _whitespace_only(h: _Hunk, keep_indent: bool = False) -> bool:
+    """True when removed and added lines match line-by-line after whitespace normalization.
+
+    For indentation-sensitive files (`keep_indent`) leading whitespace must match exactly.
+    """
+    removed = [_normalize_ws(ln[1:], keep_indent) for ln in h.lines if ln.startswith("-")]
+    added = [_normalize_ws(ln[1:], keep_indent) for ln in h.lines if ln.startswith("+")]
+    return removed == added
+
+
+def _format_hunk(h: _Hunk) -> str:
+    old_n = sum(1 for ln in h.lines if ln[:1] != "+" and not ln.startswith("\\"))
+    new_n = sum(1 for ln in h.lines if ln[:1] != "-" and not ln.startswith("\\"))
+    section = f" {h.header}" if h.header else ""
+    lines = [f"@@ -{h.old_start},{old_n} +{h.new_start},{new_n} @@{section}"]
+    lines.extend(ln for ln in h.lines if not ln.startswith("\\"))
+    return "\n".join(lines)
@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import hashlib
+import os
+import select
+import struct
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from agentic_changescribe.tools.git_tools import GitTools
+
+_IN_MODIFY = 0x002
+_IN_ATTRIB = 0x004
+_IN_CLOSE_WRITE = 0x008
+_IN_MOVED_FROM = 0x040
+_IN_MOVED_TO = 0x080
+_IN_CREATE = 0x100
+_IN_DELETE = 0x200
+_IN_Q_OVERFLOW = 0x4000
+_IN_ISDIR = 0x40000000
+_WATCH_MASK = _IN_MODIFY | _IN_ATTRIB | _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE
+_EVENT_HEADER = struct.Struct("iIII")
+
+_SKIP_DIRS = {".git", "node_modules", "__pycache__", ".venv", "venv", ".tox", ".mypy_cache", ".pytest_cache"}
+_GIT_STATE_FILES = {"index", "HEAD"}
+
+
+class _InotifyBackend:
+    """Linux inotify via libc; watches every tracked directory plus the git index."""
+
+    def __init__(self, git: GitTools, exclude: List[Path]) -> None:
+        libc_name = ctypes.util.find_library("c") or "libc.so.6"
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._root = git.repo_path
+        self._exclude = [p.resolve() for p in exclude]
+        self._dirs: Dict[int, Path] = {}
+        self._git_dir_wd = self._add(git.git_dir())
+        for rel in sorted({str(Path(p).parent) for p in git.ls_files_blobs()} | {"."}):
+            self._add(self._root / rel)
+
+    def _add(self, path: Path) -> int:
+        if any(path == ex or ex in path.parents for ex in self._exclude):
+            return -1
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(str(path)), _WATCH_MASK)
+        if wd >= 0:
+            self._dirs[wd] = path
+        return wd
+
+    def wait(self, timeout: Optional[float]) -> bool:
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return False
+        try:
+            buf = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return False
+        relevant = False
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(buf):
+            wd, mask, _, name_len = _EVENT_HEADER.unpack_from(buf, offset)
+            offset += _EVENT_HEADER.size
+            name = os.fsdecode(buf[offset: offset + name_len].rstrip(b"\0"))
+            offset += name_len
+            if mask & _IN_Q_OVERFLOW:
+                relevant = True
+                continue
+            if wd == self._git_dir_wd:
+                relevant = relevant or name in _GIT_STATE_FILES
+                continue
+            parent = self._dirs.get(wd)
+            if parent is None:
+                continue
+            if mask & _IN_ISDIR and mask & (_IN_CREATE | _IN_MOVED_TO) and name not in _SKIP_DIRS:
+                self._add(parent / name)
+            relevant = True
+        return relevant
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+
+class _PollingBackend:
+    """Portable fallback: fingerprints `git status` plus mtimes of dirty files."""
+
+    def __init__(self, git: GitTools, interval_s: float) -> None:
+        self._git = git
+        self._interval_s = interval_s
+        self._last = self._signature()
+
+    def _signature(self) -> str:
+        try:
+            status = self._git.status_porcelain()
+        except (subprocess.CalledProcessError, OSError):
+            return ""
+        h = hashlib.sha256(status.encode("utf-8", errors="replace"))
+        for entry in status.split("\0"):
+            path = entry[3:]
+            if not path:
+                continue
+            try:
+                st = (self._git.repo_path / path).stat()
+                h.update(f"{path}:{st.st_mtime_ns}:{st.st_size}".encode())
+            except OSError:
+                continue
+        return h.hexdigest()
+
+    def wait(self, timeout: Optional[float]) -> bool:
+        time.sleep(self._interval_s if timeout is None else min(timeout, self._interval_s))
+        sig = self._signature()
+        changed = sig != self._last
+        self._last = sig
+        return changed
+
+    def close(self) -> None:
+        return None
+
+
+class FileWatcher:
+    """Yields once per settled burst of worktree/index changes."""
+
+    def __init__(
+        self,
+        git: GitTools,
+        exclude: Optional[List[Path]] = None,
+        debounce_s: float = 0.5,
+        poll_interval_s: float = 1.0,
+        force_polling: bool = False,
+    ) -> None:
+        self.debounce_s = debounce_s
+        self.backend_name = "polling"
+        self._backend: _InotifyBackend | _PollingBackend
+        if not force_polling and sys.platform.startswith("linux"):
+            try:
+                self._backend = _InotifyBackend(git, exclude or [])
+                self.backend_name = "inotify"
+                return
+            except (OSError, AttributeError):
+                pass
+        self._backend = _PollingBackend(git, poll_interval_s)
+
+    def changes(self) -> Iterator[None]:
+        try:
+            while True:
+                if not self._backend.wait(None):
+                    continue
+                deadline = time.monotonic() + self.debounce_s
+                while True:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    if self._backend.wait(remaining):
+                        deadline = time.monotonic() + self.debounce_s
+                yield
+        finally:
+            self._backend.close()
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 import pathlib
 import subprocess
-from typing import List
+from typing import Dict, Iterable, Iterator, List, Optional
 
 
 class GitTools:
@@ -25,6 +25,99 @@ class GitTools:
     def diff_text(self, mode: str = "auto") -> str:
         return self._run(self._diff_cmd(mode))
 
+    def git_path(self, name: str) -> pathlib.Path:
+        """Resolve a path inside the repo's git dir (used for local caches)."""
+        out = self._run(["git", "rev-parse", "--git-path", name]).strip()
+        p = pathlib.Path(out)
+        return p if p.is_absolute() else self.repo_path / p
+
+    def git_dir(self) -> pathlib.Path:
+        out = self._run(["git", "rev-parse", "--git-dir"]).strip()
+        p = pathlib.Path(out)
+        return p if p.is_absolute() else self.repo_path / p
+
+    def status_porcelain(self) -> str:
+        return self._run(["git", "status", "--porcelain=v1", "-z"])
+
+    def ls_files_blobs(self) -> Dict[str, str]:
+        """Map every tracked path to its blob SHA in the index."""
+        out = self._run(["git", "ls-files", "-s", "-z"])
+        blobs: Dict[str, str] = {}
+        for entry in out.split("\0"):
+            if not entry:
+                continue
+            meta, _, path = entry.partition("\t")
+            parts = meta.split()
+            if len(parts) >= 2 and not parts[0].startswith("160000"):
+                blobs[path] = parts[1]
+        return blobs
+
+    def hash_objects(self, paths: List[str]) -> Dict[str, str]:
+        """Blob SHAs of the given worktree files (missing files are skipped)."""
+        existing = [p for p in paths if (self.repo_path / p).is_file()]
+        if not existing:
+            return {}
+        out = self._run(["git", "hash-object", "--stdin-paths"], input="\n".join(existing) + "\n")
+        return dict(zip(existing, out.split()))
+
+    def worktree_blobs(self) -> Dict[str, Optional[str]]:
+        """Worktree blob SHAs of tracked files with unstaged edits (None when deleted from the worktree).
+
+        Overlay this on `ls_files_blobs()` before keying anything parsed from the worktree.
+        """
+        out = self._run(["git", "diff", "--name-only", "-z"])
+        paths = [p for p in out.split("\0") if p]
+        shas = self.hash_objects(paths)
+        return {p: shas.get(p) for p in paths}
+
+    def head_sha(self) -> Optional[str]:
+        """Commit SHA of HEAD, or None in a repo without commits."""
+        try:
+            return self._run(["git", "rev-parse", "--verify", "-q", "HEAD"]).strip() or None
+        except subprocess.CalledProcessError:
+            return None
+
+    def is_ancestor(self, ancestor: str, commit: str) -> bool:
+        proc = subprocess.run(
+            ["git", "merge-base", "--is-ancestor", ancestor, commit],
+            cwd=str(self.repo_path),
+            capture_output=True,
+        )
+        return proc.returncode == 0
+
+    def stream_lines(self, cmd: List[str]) -> Iterator[str]:
+        """Yield stdout lines as git produces them (for history walks too large to buffer)."""
+        proc = subprocess.Popen(
+            cmd,
+            cwd=str(self.repo_path),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            encoding="utf-8",
+            errors="replace",
+        )
+        assert proc.stdout is not None
+        try:
+            for line in proc.stdout:
+                yield line.rstrip("\n")
+        finally:
+            proc.stdout.close()
+            returncode = proc.wait()
+        if returncode != 0:
+            raise subprocess.CalledProcessError(returncode, cmd)
+
+    def check_attr(self, paths: Iterable[str], attrs: List[str]) -> Dict[str, Dict[str, str]]:
+        """Resolve .gitattributes values (set|unset|unspecified|<value>) per path."""
+        stdin = "\0".join(paths)
+        if not stdin:
+            return {}
+        out = self._run(["git", "check-attr", "-z", "--stdin", *attrs], input=stdin + "\0")
+        fields = out.split("\0")
+        result: Dict[str, Dict[str, str]] = {}
+        for i in range(0, len(fields) - 2, 3):
+            result.setdefault(fields[i], {})[fields[i + 1]] = fields[i + 2]
+        return result
+
     def _diff_name_only_cmd(self, mode: str) -> List[str]:
         mode = (mode or "auto").lower()
         if mode == "staged":
@@ -47,12 +140,13 @@ class GitTools:
         staged = self._run(["git", "diff", "--staged"]).strip()
         return ["git", "diff", "--staged"] if staged else ["git", "diff", "HEAD"]
 
-    def _run(self, cmd: List[str]) -> str:
+    def _run(self, cmd: List[str], input: Optional[str] = None) -> str:
         proc = subprocess.run(
             cmd,
             cwd=str(self.repo_path),
             check=True,
             capture_output=True,
             text=True,
+            input=input,
         )
         return proc.stdout
@@ -0,0 +1,292 @@
+from __future__ import annotations
+
+import bisect
+import json
+import math
+import re
+from dataclasses import astuple, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from agentic_changescribe.tools.git_tools import GitTools
+
+INDEX_VERSION = 1
+HALF_LIFE_DAYS = 90.0
+MAX_COCHANGE_FILES = 30
+MAX_COCHANGE_ENTRIES = 1_000_000
+MAX_AUTHORS_PER_FILE = 64
+MIN_COUPLING = 0.3
+MIN_COUPLED_COMMITS = 3
+FLOOR_MIN_COMMITS = 5
+FLOOR_MIN_SCORE = 0.9
+RISK_RANK = {"LOW": 0, "MEDIUM": 1, "HIGH": 2}
+
+_LAMBDA = math.log(2) / (HALF_LIFE_DAYS * 86400)
+_HEADER = "\x1e"
+_LOG_FORMAT = "--format=%x1e%H%x1f%at%x1f%aE%x1f%s"
+_FIX_RE = re.compile(r"\b(fix(es|ed)?|bug|hotfix|regression|patch)\b", re.I)
+_REVERT_RE = re.compile(r'^Revert\b|\breverts? commit\b', re.I)
+_BRACE_RENAME_RE = re.compile(r"^(.*)\{(.*) => (.*)\}(.*)$")
+
+
+@dataclass
+class FileHistory:
+    commits: int = 0
+    added: int = 0
+    deleted: int = 0
+    fixes: int = 0
+    reverts: int = 0
+    # Exponentially decayed counts, stored relative to the index's ref_ts.
+    recent_commits: float = 0.0
+    recent_fixes: float = 0.0
+    recent_reverts: float = 0.0
+    last_ts: int = 0
+    authors: List[int] = field(default_factory=list)
+
+
+@dataclass
+class FileHotspot:
+    path: str
+    score: float
+    history: FileHistory
+    decay: float
+    coupled: List[Tuple[str, float]] = field(default_factory=list)
+
+    def describe(self) -> str:
+        h, d = self.history, self.decay
+        parts = [
+            f"{self.path}: hotspot {self.score:.2f}",
+            f"{h.commits} commits ({h.recent_commits * d:.1f} recent)",
+            f"{len(h.authors)}{'+' if len(h.authors) >= MAX_AUTHORS_PER_FILE else ''} authors",
+            f"{h.fixes} fixes ({h.recent_fixes * d:.1f} recent)",
+        ]
+        if h.reverts:
+            parts.append(f"{h.reverts} reverts ({h.recent_reverts * d:.1f} recent)")
+        line = "; ".join(parts)
+        if self.coupled:
+            line += "; usually changes with " + ", ".join(f"{p} ({r:.0%})" for p, r in self.coupled) + " (not in this change)"
+        return line
+
+
+@dataclass
+class HotspotReport:
+    files: List[FileHotspot] = field(default_factory=list)
+    new_files: List[str] = field(default_factory=list)
+
+    def is_empty(self) -> bool:
+        return not self.files
+
+    def to_evidence_value(self, max_files: int = 10) -> str:
+        lines = [f.describe() for f in self.files[:max_files]]
+        if len(self.files) > max_files:
+            lines.append(f"+{len(self.files) - max_files} more files with history")
+        if self.new_files:
+            lines.append(f"no history: {', '.join(self.new_files[:max_files])}")
+        return "\n".join(lines)
+
+    def risk_floor(self) -> Optional[Tuple[str, str]]:
+        """Deterministic minimum risk level implied by history, with its reason."""
+        for f in self.files:
+            if f.history.commits < FLOOR_MIN_COMMITS or f.score < FLOOR_MIN_SCORE:
+                continue
+            if f.history.recent_reverts * f.decay >= 0.5:
+                return "HIGH", f"{f.path} is a top-{1 - FLOOR_MIN_SCORE:.0%} hotspot with a recent revert"
+        for f in self.files:
+            if f.history.commits >= FLOOR_MIN_COMMITS and f.score >= FLOOR_MIN_SCORE:
+                return "MEDIUM", f"{f.path} is a top-{1 - FLOOR_MIN_SCORE:.0%} hotspot (churn, fixes, authors)"
+        return None
+
+
+def _unquote(path: str) -> str:
+    if len(path) >= 2 and path[0] == path[-1] == '"':
+        return path[1:-1].encode("utf-8").decode("unicode_escape").encode("latin-1").decode("utf-8", errors="replace")
+    return path
+
+
+def _split_rename(path: str) -> Tuple[Optional[str], str]:
+    """numstat path -> (old path if renamed, new path)."""
+    m = _BRACE_RENAME_RE.match(path)
+    if m:
+        pre, old, new, post = m.groups()
+        return re.sub("/+", "/", f"{pre}{old}{post}"), re.sub("/+", "/", f"{pre}{new}{post}")
+    if " => " in path:
+        old, new = path.split(" => ", 1)
+        return _unquote(old), _unquote(new)
+    return None, _unquote(path)
+
+
+class HistoryIndex:
+    """Incremental per-file history built from one streaming `git log --numstat` pass.
+
+    The index remembers the last commit it consumed; later refreshes only read
+    `last..HEAD`. If HEAD is no longer a descendant (rebase, branch switch) the
+    index is rebuilt from the most recent `max_commits` commits.
+    """
+
+    def __init__(self, git: GitTools, cache_path: Optional[Path] = None, max_commits: int = 20_000) -> None:
+        self.git = git
+        self.cache_path = cache_path or git.git_path("agentic-scribe/history.json")
+        self.max_commits = max_commits
+        self.head: Optional[str] = None
+        self.ref_ts: Optional[int] = None
+        self.last_ts = 0
+        self.authors: Dict[str, int] = {}
+        self.files: Dict[str, FileHistory] = {}
+        self.cochange: Dict[str, Dict[str, int]] = {}
+        self.stats: Dict[str, int] = {"commits": 0, "files": 0, "rebuilt": 0}
+
+    def refresh(self) -> "HistoryIndex":
+        head = self.git.head_sha()
+        self._load()
+        rebuilt = 0
+        cmd = ["git", "-c", "core.quotepath=off", "log", "--reverse", "--no-merges", "--numstat", "--summary", _LOG_FORMAT]
+        if head is None:
+            commits = 0
+        elif self.head == head:
+            commits = 0
+        elif self.head and self.git.is_ancestor(self.head, head):
+            commits = self._consume([*cmd, f"{self.head}..{head}", "--"])
+        else:
+            self._reset()
+            rebuilt = 1
+            commits = self._consume([*cmd, f"--max-count={self.max_commits}", head, "--"])
+        if head and head != self.head:
+            self.head = head
+            self._save()
+        self.stats = {"commits": commits, "files": len(self.files), "rebuilt": rebuilt}
+        return self
+
+    def hotspots(self, changed_files: List[str], max_coupled: int = 3) -> HotspotReport:
+        decay = math.exp(_LAMBDA * ((self.ref_ts or 0) - self.last_ts))
+        raws = sorted(self._raw(h, decay) for h in self.files.values())
+        report = HotspotReport()
+        changed = set(changed_files)
+        for path in changed_files:
+            h = self.files.get(path)
+            if h is None:
+                report.new_files.append(path)
+                continue
+            score = bisect.bisect_right(raws, self._raw(h, decay)) / len(raws)
+            coupled = []
+            for other, n in self.cochange.get(path, {}).items():
+                ratio = n / h.commits
+                if other not in changed and other in self.files and n >= MIN_COUPLED_COMMITS and ratio >= MIN_COUPLING:
+                    coupled.append((other, ratio))
+            coupled.sort(key=lambda c: (-c[1], c[0]))
+            report.files.append(FileHotspot(path=path, score=score, history=h, decay=decay, coupled=coupled[:max_coupled]))
+        report.files.sort(key=lambda f: -f.score)
+        return report
+
+    @staticmethod
+    def _raw(h: FileHistory, decay: float) -> float:
+        return (
+            math.log1p(h.recent_commits * decay)
+            + 2 * math.log1p(h.recent_fixes * decay)
+            + 3 * math.log1p(h.recent_reverts * decay)
+            + 0.5 * math.log1p(len(h.authors))
+        )
+
+    def _consume(self, cmd: List[str]) -> int:
+        commits = 0
+        current: Optional[Tuple[int, str, str]] = None
+        changes: List[Tuple[Optional[str], str, int, int]] = []
+        deletes: List[str] = []
+        for line in self.git.stream_lines(cmd):
+            if line.startswith(_HEADER):
+                if current:
+                    self._apply(*current, changes, deletes)
+                    commits += 1
+                _, ts, author, subject = (line[1:].split("\x1f", 3) + ["", "", ""])[:4]
+                current = (int(ts or 0), author.lower(), subject)
+                changes, deletes = [], []
+            elif line.startswith(" delete mode "):
+                deletes.append(_unquote(line.split(" ", 4)[-1]))
+            elif "\t" in line:
+                added, deleted, path = line.split("\t", 2)
+                old, new = _split_rename(path)
+                changes.append((old, new, int(added) if added.isdigit() else 0, int(deleted) if deleted.isdigit() else 0))
+        if current:
+            self._apply(*current, changes, deletes)
+            commits += 1
+        return commits
+
+    def _apply(self, ts: int, author: str, subject: str, changes: List[Tuple[Optional[str], str, int, int]], deletes: List[str]) -> None:
+        if self.ref_ts is None:
+            self.ref_ts = ts
+        self.last_ts = max(self.last_ts, ts)
+        weight = math.exp(_LAMBDA * (ts - self.ref_ts))
+        is_revert = bool(_REVERT_RE.search(subject))
+        is_fix = not is_revert and bool(_FIX_RE.search(subject))
+        author_id = self.authors.setdefault(author, len(self.authors))
+
+        paths: List[str] = []
+        for old, new, added, deleted in changes:
+            if old and old in self.files:
+                self.files[new] = self.files.pop(old)
+                if old in self.cochange:
+                    self.cochange[new] = self.cochange.pop(old)
+            h = self.files.setdefault(new, FileHistory())
+            h.commits += 1
+            h.added += added
+            h.deleted += deleted
+            h.recent_commits += weight
+            if is_fix:
+                h.fixes += 1
+                h.recent_fixes += weight
+            if is_revert:
+                h.reverts += 1
+                h.recent_reverts += weight
+            h.last_ts = max(h.last_ts, ts)
+            if author_id not in h.authors and len(h.authors) < MAX_AUTHORS_PER_FILE:
+                h.authors.append(author_id)
+            paths.append(new)
+
+        if 2 <= len(paths) <= MAX_COCHANGE_FILES:
+            for a in paths:
+                row = self.cochange.setdefault(a, {})
+                for b in paths:
+                    if a != b:
+                        row[b] = row.get(b, 0) + 1
+        for path in deletes:
+            self.files.pop(path, None)
+            self.cochange.pop(path, None)
+
+    def _reset(self) -> None:
+        self.head = None
+        self.ref_ts = None
+        self.last_ts = 0
+        self.authors = {}
+        self.files = {}
+        self.cochange = {}
+
+    def _load(self) -> None:
+        try:
+            data = json.loads(self.cache_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        if data.get("version") != INDEX_VERSION:
+            return
+        self.head = data.get("head")
+        self.ref_ts = data.get("ref_ts")
+        self.last_ts = data.get("last_ts", 0)
+        self.authors = data.get("authors", {})
+        self.files = {p: FileHistory(*row) for p, row in data.get("files", {}).items()}
+        self.cochange = data.get("cochange", {})
+
+    def _save(self) -> None:
+        if sum(len(r) for r in self.cochange.values()) > MAX_COCHANGE_ENTRIES:
+            self.cochange = {a: {b: n for b, n in row.items() if n > 1} for a, row in self.cochange.items()}
+            self.cochange = {a: row for a, row in self.cochange.items() if row}
+        payload: Dict[str, Any] = {
+            "version": INDEX_VERSION,
+            "head": self.head,
+            "ref_ts": self.ref_ts,
+            "last_ts": self.last_ts,
+            "authors": self.authors,
+            "files": {p: list(astuple(h)) for p, h in self.files.items()},
+            "cochange": self.cochange,
+        }
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.cache_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(payload, separators=(",", ":")), encoding="utf-8")
+        tmp.replace(self.cache_path)
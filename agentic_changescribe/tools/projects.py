@@ -0,0 +1,204 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import posixpath
+import shlex
+import tomllib
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from agentic_changescribe.tools.git_tools import GitTools
+
+CACHE_VERSION = 2
+
+_MANIFESTS = {
+    "pyproject.toml": "python",
+    "setup.py": "python",
+    "setup.cfg": "python",
+    "requirements.txt": "python",
+    "package.json": "npm",
+    "pom.xml": "maven",
+    "build.gradle": "gradle",
+    "build.gradle.kts": "gradle",
+    "go.mod": "go",
+    "Cargo.toml": "cargo",
+}
+_TEST_DIRS = ("tests", "test")
+
+
+@dataclass
+class Project:
+    root: str
+    kind: str
+    name: Optional[str] = None
+    test_dir: Optional[str] = None
+
+
+class ProjectDetector:
+    """Finds every (nested) project manifest in the repo.
+
+    The scan is a single pass over `git ls-files`, cached per index listing
+    plus the worktree stat of the manifests it reads names from.
+    """
+
+    def __init__(self, git: GitTools, cache_path: Optional[Path] = None) -> None:
+        self.git = git
+        self.cache_path = cache_path or git.git_path("agentic-scribe/projects.json")
+        self.projects: List[Project] = []
+        self._by_root: Dict[str, List[Project]] = {}
+        self._flags: Dict[str, bool] = {}
+
+    def detect(self) -> "ProjectDetector":
+        blobs = self.git.ls_files_blobs()
+        key = self._cache_key(blobs)
+        cached = self._load(key)
+        if cached is None:
+            cached = self._scan(blobs)
+            self._save(key, cached)
+        self.projects = [Project(**p) for p in cached["projects"]]
+        self._flags = cached["flags"]
+        self._by_root = {}
+        for p in self.projects:
+            self._by_root.setdefault(p.root, []).append(p)
+        return self
+
+    def nearest(self, path: str) -> List[Project]:
+        d = posixpath.dirname(path)
+        while True:
+            if d in self._by_root:
+                return self._by_root[d]
+            if not d:
+                return []
+            d = posixpath.dirname(d)
+
+    def test_commands(self, changed_files: List[str]) -> List[str]:
+        """Shell command lines (values are shell-quoted; the runner uses shell=True)."""
+        return list(self.test_targets(changed_files))
+
+    def test_targets(self, changed_files: List[str]) -> Dict[str, str]:
+        """Test command -> root of the project it tests, in command order."""
+        targets: Dict[str, str] = {}
+        go_pkgs: Dict[str, List[str]] = {}
+        for path in changed_files:
+            for project in self.nearest(path):
+                if project.kind == "go":
+                    pkg = _go_package(path, project.root)
+                    if pkg:
+                        go_pkgs.setdefault(project.root, []).append(pkg)
+                    continue
+                targets.setdefault(self._command(project), project.root)
+        for root, pkgs in go_pkgs.items():
+            cmd = "go test " + " ".join(shlex.quote(p) for p in sorted(set(pkgs)))
+            targets[f"(cd {shlex.quote(root)} && {cmd})" if root else cmd] = root
+        return targets
+
+    def _command(self, p: Project) -> str:
+        q = shlex.quote
+        if p.kind == "python":
+            target = p.test_dir or p.root
+            return f"pytest -q {q(target)}" if target else "pytest -q"
+        if p.kind == "npm":
+            if not p.root:
+                return "npm test"
+            if self._flags.get("npm_workspaces"):
+                return f"npm test -w {q(p.name or p.root)}"
+            return f"npm --prefix {q(p.root)} test"
+        if p.kind == "maven":
+            if not p.root:
+                return "mvn test"
+            return f"mvn -pl {q(p.root)} -am test" if self._flags.get("root_pom") else f"mvn -f {q(p.root + '/pom.xml')} test"
+        if p.kind == "gradle":
+            gradle = "./gradlew" if self._flags.get("gradlew") else "gradle"
+            if not p.root:
+                return f"{gradle} test"
+            return f"{gradle} {q(':' + p.root.replace('/', ':') + ':test')}"
+        if p.kind == "cargo":
+            return f"cargo test -p {q(p.name)}" if p.name else "cargo test"
+        return "TODO: add project-specific test command"
+
+    def _scan(self, blobs: Dict[str, str]) -> Dict[str, object]:
+        paths = list(blobs)
+        test_dirs = set()
+        found: Dict[Tuple[str, str], Project] = {}
+        for path in paths:
+            parts = path.split("/")
+            for i, part in enumerate(parts[:-1]):
+                if part in _TEST_DIRS:
+                    test_dirs.add("/".join(parts[: i + 1]))
+            kind = _MANIFESTS.get(parts[-1])
+            if kind:
+                root = "/".join(parts[:-1])
+                found.setdefault((root, kind), Project(root=root, kind=kind, name=self._name(path, kind)))
+        for p in found.values():
+            if p.kind == "python":
+                p.test_dir = next((t for t in (posixpath.join(p.root, d) for d in _TEST_DIRS) if t in test_dirs), None)
+        flags = {
+            "npm_workspaces": self._has_workspaces(),
+            "root_pom": ("", "maven") in found,
+            "gradlew": "gradlew" in paths,
+        }
+        return {"projects": [asdict(p) for p in sorted(found.values(), key=lambda p: (p.root, p.kind))], "flags": flags}
+
+    def _name(self, path: str, kind: str) -> Optional[str]:
+        try:
+            text = (self.git.repo_path / path).read_text(encoding="utf-8")
+            if kind == "npm":
+                return json.loads(text).get("name")
+            if kind == "cargo":
+                return tomllib.loads(text).get("package", {}).get("name")
+        except (OSError, ValueError, AttributeError):
+            return None
+        return None
+
+    def _has_workspaces(self) -> bool:
+        try:
+            data = json.loads((self.git.repo_path / "package.json").read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return False
+        return isinstance(data, dict) and bool(data.get("workspaces"))
+
+    def _cache_key(self, blobs: Dict[str, str]) -> str:
+        """Read-only key: the index listing, plus worktree stat of manifests `_name` reads (unstaged edits count)."""
+        h = hashlib.sha256()
+        read = ["package.json"]
+        for path, sha in blobs.items():
+            h.update(f"{path}\0{sha}\n".encode())
+            if _MANIFESTS.get(posixpath.basename(path)) in ("npm", "cargo"):
+                read.append(path)
+        for path in read:
+            try:
+                st = os.stat(self.git.repo_path / path)
+                h.update(f"{path}\0{st.st_size}:{st.st_mtime_ns}\n".encode())
+            except OSError:
+                h.update(f"{path}\0missing\n".encode())
+        return h.hexdigest()
+
+    def _load(self, key: str) -> Optional[Dict[str, object]]:
+        try:
+            data = json.loads(self.cache_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if data.get("version") != CACHE_VERSION or data.get("key") != key:
+            return None
+        return data
+
+    def _save(self, key: str, data: Dict[str, object]) -> None:
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        payload = {"version": CACHE_VERSION, "key": key, **data}
+        tmp = self.cache_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(payload, separators=(",", ":")), encoding="utf-8")
+        tmp.replace(self.cache_path)
+
+
+def _go_package(path: str, root: str) -> Optional[str]:
+    """Package pattern for a changed file, relative to its module root; None for non-Go files."""
+    name = posixpath.basename(path)
+    if name in ("go.mod", "go.sum"):
+        return "./..."
+    if not name.endswith(".go"):
+        return None
+    rel = posixpath.relpath(posixpath.dirname(path) or ".", root or ".")
+    return "." if rel == "." else f"./{rel}"
@@ -0,0 +1,452 @@
+from __future__ import annotations
+
+import heapq
+import json
+import math
+import mmap
+import os
+import re
+import struct
+from array import array
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from agentic_changescribe.core.models import Evidence
+from agentic_changescribe.tools.diff_minimizer import estimate_tokens, path_reason
+from agentic_changescribe.tools.git_tools import GitTools
+from agentic_changescribe.tools.redaction import Redactor
+
+INDEX_VERSION = 1
+MAX_FILE_BYTES = 512_000
+PARALLEL_THRESHOLD = 256
+COMPACT_MIN_DOCS = 500
+COMPACT_FRACTION = 0.02
+MAX_QUERY_TERMS = 24
+MAX_DF_FLOOR = 100
+MAX_DF_FRACTION = 0.05
+K1 = 1.2
+B = 0.75
+
+_MAGIC = b"ACSBM25\0"
+# magic, version, n_docs, build_id, n_terms, total_len, then section offsets:
+# doc lengths, term offsets, term posting starts, posting docs, posting tfs, term bytes, end.
+_HEADER = struct.Struct("<8sIIQIQ7Q")
+
+_IDENT_RE = re.compile(r"[A-Za-z_][A-Za-z0-9_]*(?:-[A-Za-z][A-Za-z0-9_]*)*")
+_CAMEL_RE = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|[0-9]+")
+_SPLIT_RE = re.compile(r"[_-]+")
+_STOPWORDS = {
+    "self", "this", "that", "return", "import", "from", "def", "class", "function", "const", "let", "var",
+    "true", "false", "null", "none", "nil", "undefined", "public", "private", "protected", "static", "final",
+    "void", "new", "for", "while", "else", "elif", "try", "except", "catch", "finally", "with", "and", "not",
+    "the", "int", "str", "string", "bool", "boolean", "async", "await", "yield", "pass", "raise", "throw",
+    "throws", "package", "func", "struct", "type", "interface", "extends", "implements", "lambda", "print",
+}
+
+
+def identifier_terms(ident: str) -> List[str]:
+    """Index terms for one identifier: the separator-free lowercase form plus its sub-words.
+
+    `retryMax`, `retry_max`, `RETRY_MAX` and `retry-max` all share the term `retrymax`.
+    """
+    full = ident.replace("_", "").replace("-", "").lower()
+    terms = [full] if 3 <= len(full) <= 64 and full not in _STOPWORDS else []
+    parts = [p.lower() for chunk in _SPLIT_RE.split(ident) if chunk for p in _CAMEL_RE.findall(chunk)]
+    if len(parts) > 1:
+        terms.extend(p for p in parts if len(p) >= 3 and p != full and p not in _STOPWORDS and not p.isdigit())
+    return terms
+
+
+def tokenize(text: str) -> Counter:
+    counts: Counter = Counter()
+    for ident, n in Counter(_IDENT_RE.findall(text)).items():
+        for term in identifier_terms(ident):
+            counts[term] += n
+    return counts
+
+
+def diff_query_terms(diff_text: str) -> Counter:
+    """Identifier terms on the added/removed lines of a unified (or minimized) diff."""
+    counts: Counter = Counter()
+    for line in diff_text.splitlines():
+        if line[:1] in ("+", "-") and not line.startswith(("+++ ", "--- ")):
+            counts.update(tokenize(line[1:]))
+    return counts
+
+
+def indexable(path: str) -> bool:
+    return path_reason(path) is None
+
+
+def _tokenize_file(path: str) -> Optional[Tuple[int, Dict[str, int]]]:
+    try:
+        p = Path(path)
+        if p.stat().st_size > MAX_FILE_BYTES:
+            return 0, {}
+        raw = p.read_bytes()
+    except OSError:
+        return None
+    if b"\0" in raw[:8192]:
+        return 0, {}
+    counts = tokenize(raw.decode("utf-8", errors="replace"))
+    return sum(counts.values()), dict(counts)
+
+
+def _aligned(n: int) -> int:
+    return (n + 7) & ~7
+
+
+def _write_segment(path: Path, build_id: int, doclens: List[int], postings: Dict[str, Tuple[array, array]]) -> None:
+    terms = sorted(postings)
+    blob = bytearray()
+    term_offs = array("I", [0])
+    term_starts = array("I", [0])
+    docs = array("I")
+    tfs = array("H")
+    for t in terms:
+        blob += t.encode("utf-8")
+        term_offs.append(len(blob))
+        d, f = postings[t]
+        docs.extend(d)
+        tfs.extend(f)
+        term_starts.append(len(docs))
+    sections = [array("I", doclens).tobytes(), term_offs.tobytes(), term_starts.tobytes(), docs.tobytes(), tfs.tobytes(), bytes(blob)]
+    offsets = []
+    pos = _aligned(_HEADER.size)
+    for sec in sections:
+        offsets.append(pos)
+        pos = _aligned(pos + len(sec))
+    offsets.append(pos)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(_HEADER.pack(_MAGIC, INDEX_VERSION, len(doclens), build_id, len(terms), sum(doclens), *offsets))
+        for off, sec in zip(offsets, sections):
+            f.seek(off)
+            f.write(sec)
+        f.truncate(pos)
+    os.replace(tmp, path)
+
+
+class _Segment:
+    """Read-only, memory-mapped BM25 postings (term dictionary is binary-searched in place)."""
+
+    def __init__(self, path: Path) -> None:
+        self._file = open(path, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, n_docs, build_id, n_terms, total_len, *offs = _HEADER.unpack_from(self._mm, 0)
+        if magic != _MAGIC or version != INDEX_VERSION:
+            self.close()
+            raise ValueError("unsupported retrieval segment")
+        self.n_docs, self.build_id, self.n_terms, self.total_len = n_docs, build_id, n_terms, total_len
+        mv = memoryview(self._mm)
+        self._views = [
+            mv[offs[0]: offs[0] + 4 * n_docs].cast("I"),
+            mv[offs[1]: offs[1] + 4 * (n_terms + 1)].cast("I"),
+            mv[offs[2]: offs[2] + 4 * (n_terms + 1)].cast("I"),
+        ]
+        self.doclens, self._term_offs, self._term_starts = self._views
+        n_postings = self._term_starts[n_terms]
+        self._views += [
+            mv[offs[3]: offs[3] + 4 * n_postings].cast("I"),
+            mv[offs[4]: offs[4] + 2 * n_postings].cast("H"),
+            mv[offs[5]: offs[6]],
+            mv,
+        ]
+        self.docs, self.tfs, self._blob = self._views[3:6]
+
+    def term_id(self, term: str) -> int:
+        key = term.encode("utf-8")
+        lo, hi = 0, self.n_terms
+        while lo < hi:
+            mid = (lo + hi) // 2
+            probe = self._blob[self._term_offs[mid]: self._term_offs[mid + 1]].tobytes()
+            if probe < key:
+                lo = mid + 1
+            elif probe > key:
+                hi = mid
+            else:
+                return mid
+        return -1
+
+    def span(self, tid: int) -> Tuple[int, int]:
+        return self._term_starts[tid], self._term_starts[tid + 1]
+
+    def iter_terms(self) -> Iterable[Tuple[str, int, int]]:
+        for tid in range(self.n_terms):
+            yield self._blob[self._term_offs[tid]: self._term_offs[tid + 1]].tobytes().decode("utf-8"), *self.span(tid)
+
+    def close(self) -> None:
+        for v in reversed(getattr(self, "_views", [])):
+            v.release()
+        self._views = []
+        self._mm.close()
+        self._file.close()
+
+
+@dataclass
+class Snippet:
+    path: str
+    start: int
+    end: int
+    text: str
+    score: float
+    matched: List[str] = field(default_factory=list)
+
+    def to_evidence(self, redactor: Redactor) -> Evidence:
+        note = f"{self.path} L{self.start}-{self.end}, unchanged; matches {', '.join(self.matched[:5])}"
+        return Evidence(type="related_context", value=redactor.redact_text(self.text), note=note)
+
+
+class RetrievalIndex:
+    """Incremental BM25 index over identifier-tokenized repo files.
+
+    The bulk of the index is an immutable segment that is memory-mapped for
+    queries; files whose blob SHA changed since it was built are kept in a
+    small delta (term counts in the JSON sidecar) and the two are merged once
+    the delta grows past a fraction of the segment.
+    """
+
+    def __init__(self, git: GitTools, cache_dir: Optional[Path] = None) -> None:
+        self.git = git
+        self.cache_dir = cache_dir or git.git_path("agentic-scribe")
+        self.segment_path = self.cache_dir / "bm25.seg"
+        self.meta_path = self.cache_dir / "bm25.json"
+        self.paths: Dict[str, str] = {}
+        self.stats: Dict[str, int] = {"files": 0, "tokenized": 0, "delta": 0, "compacted": 0}
+        self._segment: Optional[_Segment] = None
+        self._base_docs: List[List[str]] = []
+        self._live = bytearray()
+        self._base_count = 0
+        self._base_len = 0
+        self._delta: Dict[str, List[Any]] = {}
+
+    def refresh(self) -> "RetrievalIndex":
+        # Files are tokenized from the worktree, so unstaged edits must be keyed by their worktree SHA.
+        paths = {p: sha for p, sha in self.git.ls_files_blobs().items() if indexable(p)}
+        for p, sha in self.git.worktree_blobs().items():
+            if sha is None:
+                paths.pop(p, None)
+            elif indexable(p):
+                paths[p] = sha
+        self.paths = paths
+
+        meta = self._load_meta()
+        self._open_segment(meta)
+        base_live: Set[str] = set()
+        self._live = bytearray(len(self._base_docs))
+        for i, (p, sha) in enumerate(self._base_docs):
+            if paths.get(p) == sha:
+                self._live[i] = 1
+                base_live.add(p)
+        old_delta = meta.get("delta", {}) if self._segment else {}
+        self._delta = {p: rec for p, rec in old_delta.items() if paths.get(p) == rec[0]}
+
+        todo = [p for p in paths if p not in base_live and p not in self._delta]
+        args = [str(self.git.repo_path / p) for p in todo]
+        if len(args) >= PARALLEL_THRESHOLD:
+            with ProcessPoolExecutor() as pool:
+                results = list(pool.map(_tokenize_file, args, chunksize=64))
+        else:
+            results = [_tokenize_file(a) for a in args]
+        for p, res in zip(todo, results):
+            if res is not None:
+                self._delta[p] = [paths[p], res[0], res[1]]
+
+        dropped = len(self._base_docs) - len(base_live)
+        compact = self._segment is None or len(self._delta) + dropped > max(COMPACT_MIN_DOCS, COMPACT_FRACTION * len(self._base_docs))
+        if compact:
+            self._compact()
+        if compact or todo or len(self._delta) != len(old_delta):
+            self._save_meta()
+        self._count_live()
+        self.stats = {"files": len(paths), "tokenized": len(todo), "delta": len(self._delta), "compacted": int(compact)}
+        return self
+
+    def close(self) -> None:
+        if self._segment is not None:
+            self._segment.close()
+            self._segment = None
+
+    def search(self, query: Counter, exclude: Iterable[str] = (), limit: int = 10) -> List[Tuple[str, float, List[str]]]:
+        """Top BM25 hits as (path, score, matched terms); very common terms are ignored."""
+        seg = self._segment
+        if seg is None:
+            return []
+        delta_docs = [(p, rec) for p, rec in self._delta.items() if rec[1]]
+        n_docs = self._base_count + len(delta_docs)
+        if not n_docs:
+            return []
+        avgdl = (self._base_len + sum(rec[1] for _, rec in delta_docs)) / n_docs
+        max_df = max(MAX_DF_FLOOR, MAX_DF_FRACTION * n_docs)
+
+        candidates: List[Tuple[float, str, int]] = []
+        for term in query:
+            tid = seg.term_id(term)
+            lo, hi = seg.span(tid) if tid >= 0 else (0, 0)
+            df = (hi - lo) + sum(1 for _, rec in delta_docs if term in rec[2])
+            if 0 < df <= max_df:
+                idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+                candidates.append((idf, term, tid))
+        terms = heapq.nlargest(MAX_QUERY_TERMS, candidates)
+
+        excluded = set(exclude)
+        scores: Dict[Any, float] = {}
+        matched: Dict[Any, List[str]] = {}
+        norm = K1 * (1 - B)
+        for idf, term, tid in terms:
+            if tid >= 0:
+                lo, hi = seg.span(tid)
+                docs, tfs, lens, live = seg.docs, seg.tfs, seg.doclens, self._live
+                for j in range(lo, hi):
+                    d = docs[j]
+                    if not live[d]:
+                        continue
+                    tf = tfs[j]
+                    scores[d] = scores.get(d, 0.0) + idf * tf * (K1 + 1) / (tf + norm + K1 * B * lens[d] / avgdl)
+                    matched.setdefault(d, []).append(term)
+            for p, rec in delta_docs:
+                tf = rec[2].get(term)
+                if tf:
+                    scores[p] = scores.get(p, 0.0) + idf * tf * (K1 + 1) / (tf + norm + K1 * B * rec[1] / avgdl)
+                    matched.setdefault(p, []).append(term)
+
+        hits: List[Tuple[str, float, List[str]]] = []
+        for key, score in sorted(scores.items(), key=lambda kv: -kv[1]):
+            path = self._base_docs[key][0] if isinstance(key, int) else key
+            if path in excluded:
+                continue
+            hits.append((path, score, matched[key]))
+            if len(hits) >= limit:
+                break
+        return hits
+
+    def related_snippets(
+        self,
+        diff_text: str,
+        changed_files: List[str],
+        k: int = 6,
+        token_budget: int = 1500,
+        window: int = 8,
+    ) -> List[Snippet]:
+        """Best-matching windows of unchanged files for identifiers touched by the diff."""
+        query = diff_query_terms(diff_text)
+        out: List[Snippet] = []
+        budget = token_budget
+        for path, score, terms in self.search(query, exclude=changed_files, limit=k * 3):
+            if len(out) >= k or budget <= 0:
+                break
+            snippet = self._snippet(path, set(terms), window, score)
+            if snippet is None:
+                continue
+            cost = estimate_tokens(snippet.text)
+            if cost > budget:
+                continue
+            budget -= cost
+            out.append(snippet)
+        return out
+
+    def _snippet(self, path: str, terms: Set[str], window: int, score: float) -> Optional[Snippet]:
+        try:
+            lines = (self.git.repo_path / path).read_text(encoding="utf-8", errors="replace").splitlines()
+        except OSError:
+            return None
+        line_terms = [set(tokenize(ln)) & terms for ln in lines]
+        best, best_hits = 0, -1
+        for i in range(len(lines)):
+            hits = len(set().union(*line_terms[i: i + window]))
+            if hits > best_hits:
+                best, best_hits = i, hits
+        if best_hits <= 0:
+            return None
+        end = min(len(lines), best + window)
+        body = "\n".join(ln if len(ln) <= 200 else ln[:200] + "..." for ln in lines[best:end])
+        matched = sorted(set().union(*line_terms[best:end]))
+        return Snippet(path=path, start=best + 1, end=end, text=body, score=round(score, 3), matched=matched)
+
+    def _count_live(self) -> None:
+        self._base_count = self._base_len = 0
+        if self._segment is None:
+            return
+        lens = self._segment.doclens
+        for i, live in enumerate(self._live):
+            if live and lens[i]:
+                self._base_count += 1
+                self._base_len += lens[i]
+
+    def _compact(self) -> None:
+        """Rewrite the segment from its live documents plus the delta."""
+        doclens: List[int] = []
+        docs: List[List[str]] = []
+        remap = array("i", [-1]) * len(self._base_docs)
+        seg = self._segment
+        if seg is not None:
+            for i, live in enumerate(self._live):
+                if live:
+                    remap[i] = len(docs)
+                    docs.append(self._base_docs[i])
+                    doclens.append(seg.doclens[i])
+        postings: Dict[str, Tuple[array, array]] = {}
+        if seg is not None:
+            for term, lo, hi in seg.iter_terms():
+                d_out, f_out = array("I"), array("H")
+                for j in range(lo, hi):
+                    nd = remap[seg.docs[j]]
+                    if nd >= 0:
+                        d_out.append(nd)
+                        f_out.append(seg.tfs[j])
+                if d_out:
+                    postings[term] = (d_out, f_out)
+        for p, (sha, length, tf) in sorted(self._delta.items()):
+            doc = len(docs)
+            docs.append([p, sha])
+            doclens.append(length)
+            for term, n in tf.items():
+                entry = postings.get(term)
+                if entry is None:
+                    entry = postings[term] = (array("I"), array("H"))
+                entry[0].append(doc)
+                entry[1].append(min(n, 0xFFFF))
+
+        self.close()
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        build_id = int.from_bytes(os.urandom(8), "little")
+        _write_segment(self.segment_path, build_id, doclens, postings)
+        self._segment = _Segment(self.segment_path)
+        self._base_docs = docs
+        self._live = bytearray(b"\1") * len(docs)
+        self._delta = {}
+
+    def _open_segment(self, meta: Dict[str, Any]) -> None:
+        self.close()
+        self._base_docs = []
+        if not meta:
+            return
+        try:
+            seg = _Segment(self.segment_path)
+        except (OSError, ValueError, struct.error):
+            return
+        if seg.build_id != meta.get("build_id") or seg.n_docs != len(meta.get("docs", [])):
+            seg.close()
+            return
+        self._segment = seg
+        self._base_docs = meta["docs"]
+
+    def _load_meta(self) -> Dict[str, Any]:
+        try:
+            data = json.loads(self.meta_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+        if data.get("version") != INDEX_VERSION:
+            return {}
+        return data
+
+    def _save_meta(self) -> None:
+        assert self._segment is not None
+        payload = {"version": INDEX_VERSION, "build_id": self._segment.build_id, "docs": self._base_docs, "delta": self._delta}
+        tmp = self.meta_path.with_name(self.meta_path.name + ".tmp")
+        tmp.write_text(json.dumps(payload, separators=(",", ":")), encoding="utf-8")
+        tmp.replace(self.meta_path)
+
@@ -0,0 +1,233 @@
+from __future__ import annotations
+
+import collections
+import contextlib
+import os
+import shlex
+import signal
+import subprocess
+import tempfile
+import threading
+import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Deque, Dict, List, Optional, Set, Tuple
+
+from agentic_changescribe.core.models import Evidence
+from agentic_changescribe.tools.redaction import Redactor
+
+_SECRET_ENV = ("LLM_API_KEY",)
+_REPORT_PRODUCERS = ("mvn", "./gradlew", "gradle")
+_REPORT_GLOBS = ("**/surefire-reports/*.xml", "**/failsafe-reports/*.xml", "**/build/test-results/**/*.xml")
+_TAIL_LINES = 15
+_PYTEST_NO_TESTS = 5
+
+
+@dataclass
+class TestRunResult:
+    command: str
+    status: str
+    exit_code: Optional[int]
+    duration_s: float
+    tests: Optional[int] = None
+    failures: Optional[int] = None
+    errors: Optional[int] = None
+    skipped: Optional[int] = None
+    failed_cases: List[str] = field(default_factory=list)
+    tail: str = ""
+
+    def summary(self) -> str:
+        parts = [f"`{self.command}`: {self.status}"]
+        if self.tests is not None:
+            parts.append(f"({self.tests} tests, {self.failures or 0} failures, {self.errors or 0} errors, {self.skipped or 0} skipped)")
+        elif self.exit_code is not None:
+            parts.append(f"(exit={self.exit_code})")
+        parts.append(f"in {self.duration_s:.1f}s")
+        return " ".join(parts)
+
+    def to_evidence(self, redactor: Redactor) -> Evidence:
+        value = self.summary()
+        if self.failed_cases:
+            value += "\nfailing: " + ", ".join(self.failed_cases[:10])
+        if self.status != "PASS" and self.tail:
+            value += "\noutput tail:\n" + self.tail
+        return Evidence(type="test_result", value=redactor.redact_text(value), note="executed locally")
+
+
+class PendingTests:
+    """Handle for test commands running in the background."""
+
+    def __init__(self, futures: List[Future], pool: ThreadPoolExecutor, runner: "TestRunner") -> None:
+        self._futures = futures
+        self._pool = pool
+        self._runner = runner
+
+    def results(self) -> List[TestRunResult]:
+        try:
+            return [f.result() for f in self._futures]
+        finally:
+            self._pool.shutdown(wait=False)
+
+    def cancel(self) -> None:
+        """Drop queued commands and kill the process groups still running (no-op once collected)."""
+        self._runner.cancel()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+class TestRunner:
+    """Runs recommended test commands in a bounded pool.
+
+    Each command gets its own process group, a wall-clock timeout (the whole
+    group is killed on expiry) and a capped output buffer that keeps the tail.
+    Maven/Gradle commands run one at a time: their reports are found by
+    mtime across the repo, so overlapping runs would count each other's.
+    """
+
+    def __init__(
+        self,
+        repo_path: Path,
+        max_workers: int = 2,
+        timeout_s: float = 600.0,
+        max_output_bytes: int = 64_000,
+    ) -> None:
+        self.repo_path = repo_path
+        self.max_workers = max_workers
+        self.timeout_s = timeout_s
+        self.max_output_bytes = max_output_bytes
+        self._lock = threading.Lock()
+        self._reports_lock = threading.Lock()
+        self._procs: Set[subprocess.Popen] = set()
+        self._cancelled = False
+
+    def start(self, commands: List[str]) -> PendingTests:
+        runnable = [c for c in commands if not c.startswith("TODO")]
+        pool = ThreadPoolExecutor(max_workers=max(1, self.max_workers), thread_name_prefix="scribe-tests")
+        return PendingTests([pool.submit(self.run_one, c) for c in runnable], pool, self)
+
+    def cancel(self) -> None:
+        with self._lock:
+            self._cancelled = True
+            procs = list(self._procs)
+        for proc in procs:
+            _kill_group(proc)
+
+    def run_one(self, command: str) -> TestRunResult:
+        with tempfile.TemporaryDirectory(prefix="scribe-tests-") as tmp:
+            junit = Path(tmp) / "junit.xml"
+            shell_cmd = command
+            if command.startswith("pytest"):
+                shell_cmd = f"{command} --junitxml={shlex.quote(str(junit))}"
+            producer = command.startswith(_REPORT_PRODUCERS)
+            with self._reports_lock if producer else contextlib.nullcontext():
+                started = time.time()
+                exit_code, tail, timed_out = self._execute(shell_cmd)
+                duration = time.time() - started
+                reports = self._fresh_reports(started) if producer else []
+            if junit.exists():
+                reports = [junit]
+            if timed_out:
+                status = "TIMEOUT"
+            elif exit_code == 0:
+                status = "PASS"
+            elif exit_code == _PYTEST_NO_TESTS and command.startswith("pytest"):
+                status = "NO_TESTS"
+            else:
+                status = "FAIL"
+            result = TestRunResult(
+                command=command,
+                status=status,
+                exit_code=None if timed_out else exit_code,
+                duration_s=duration,
+                tail=tail,
+            )
+            if reports:
+                _apply_junit(result, reports)
+            return result
+
+    def _execute(self, shell_cmd: str) -> Tuple[Optional[int], str, bool]:
+        env = {k: v for k, v in os.environ.items() if k not in _SECRET_ENV}
+        env.setdefault("CI", "1")
+        with self._lock:
+            if self._cancelled:
+                return None, "cancelled", False
+            proc = subprocess.Popen(
+                shell_cmd,
+                shell=True,
+                cwd=str(self.repo_path),
+                env=env,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                start_new_session=True,
+            )
+            self._procs.add(proc)
+        buf: Deque[bytes] = collections.deque()
+        size = [0]
+
+        def drain() -> None:
+            assert proc.stdout is not None
+            for chunk in iter(lambda: proc.stdout.read(8192), b""):
+                buf.append(chunk)
+                size[0] += len(chunk)
+                while size[0] > self.max_output_bytes and len(buf) > 1:
+                    size[0] -= len(buf.popleft())
+
+        reader = threading.Thread(target=drain, daemon=True)
+        reader.start()
+        timed_out = False
+        try:
+            proc.wait(timeout=self.timeout_s)
+        except subprocess.TimeoutExpired:
+            timed_out = True
+            _kill_group(proc)
+            proc.wait()
+        finally:
+            with self._lock:
+                self._procs.discard(proc)
+        reader.join(timeout=5)
+        text = b"".join(buf)[-self.max_output_bytes:].decode("utf-8", errors="replace")
+        tail = "\n".join(text.rstrip().splitlines()[-_TAIL_LINES:])
+        return proc.returncode, tail, timed_out
+
+    def _fresh_reports(self, since: float) -> List[Path]:
+        found: List[Path] = []
+        for pattern in _REPORT_GLOBS:
+            for p in self.repo_path.glob(pattern):
+                try:
+                    if p.stat().st_mtime >= since:
+                        found.append(p)
+                except OSError:
+                    continue
+        return found
+
+
+def _kill_group(proc: subprocess.Popen) -> None:
+    try:
+        os.killpg(proc.pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        proc.kill()
+
+
+def _apply_junit(result: TestRunResult, reports: List[Path]) -> None:
+    totals: Dict[str, int] = {"tests": 0, "failures": 0, "errors": 0, "skipped": 0}
+    parsed = False
+    for path in reports:
+        try:
+            root = ET.parse(path).getroot()
+        except (ET.ParseError, OSError):
+            continue
+        suites = [root] if root.tag == "testsuite" else root.iter("testsuite")
+        for suite in suites:
+            parsed = True
+            for key in totals:
+                totals[key] += int(suite.get(key, "0") or 0)
+            for case in suite.iter("testcase"):
+                if case.find("failure") is not None or case.find("error") is not None:
+                    result.failed_cases.append(f"{case.get('classname', '')}::{case.get('name', '')}".lstrip(":"))
+    if parsed:
+        result.tests = totals["tests"]
+        result.failures = totals["failures"]
+        result.errors = totals["errors"]
+        result.skipped = totals["skipped"]